@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+"""Benchmark the planner on synthetic events over a sweep of sizes and record the results.
+
+Run from the planner directory:
+
+    python -m benchmarks.run --sizes 100 200 400 800 --backend highs
+    python -m benchmarks.run --database   # also time the write-back into temporary tables of the database
+"""
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import generate_event
+from src import metrics
+from src.database import connection
+from src.model import SolverProfile
+from src.rides import plan_rides, snapshot_ride_rows
+from src.snapshot import PlanSnapshot
+from src.solver import plan_rounds
+from src.writer import PlanWriter
+
+RESULTS = Path(__file__).parent / "results.jsonl"
+
+# Options of the synthetic events, a result is only compared with results of the same event shape
+GENERATOR_OPTIONS = (
+    "workers_per_job", "areas", "allergy_density", "adoring_fraction", "drivers", "history_days", "seed",
+)
+
+# Tables written by a plan, created as temporary tables which take precedence over the real ones in the session
+WRITE_TABLES = {
+    "_ActiveJobToWorker": '("A" text, "B" text)',
+    "Ride": '(id text, "driverId" text, "carId" text, "jobId" text)',
+    "_RideToWorker": '("A" text, "B" text)',
+}
+
+
+def revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).parent).stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def write_back(snapshot, assignments, rides):
+    """Write the plan with PlanWriter into temporary copies of the plan tables and return the elapsed seconds"""
+    with connection() as conn:
+        cursor = conn.cursor()
+        for table, columns in WRITE_TABLES.items():
+            cursor.execute(f'CREATE TEMP TABLE "{table}" {columns} ON COMMIT DROP')
+        writer = PlanWriter(conn)
+        writer.write_assignments(assignments, snapshot.active_jobs)
+        writer.write_rides(rides)
+        writer.commit()
+    return writer.elapsed
+
+
+def benchmark(workers, profile, options, database=False):
+    """Time generating, loading, building, solving, ride planning and optionally writing one synthetic plan"""
+    jobs = max(1, workers // options.workers_per_job)
+    areas = max(1, min(options.areas, jobs))
+    start = time.perf_counter()
+    snapshot = generate_event(workers, jobs, areas, options.allergy_density, options.adoring_fraction, options.drivers,
+                              options.history_days, options.seed)
+    generated = time.perf_counter() - start
+
+    run = metrics.start_run(snapshot.plan_id)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "snapshot.json.gz")
+        snapshot.export(path)
+        with metrics.phase("load"):
+            snapshot = PlanSnapshot.read(path)
+
+    rounds = plan_rounds(snapshot, profile)
+    assignments = {}
+    for _, _, round_assignments, _ in rounds:
+        for job, job_workers in round_assignments.items():
+            assignments.setdefault(job, []).extend(job_workers)
+    with metrics.phase("rides"):
+        rides, _, _ = plan_rides(snapshot_ride_rows(snapshot, assignments))
+    if database:
+        run.add_phase("write", write_back(snapshot, assignments, rides))
+
+    result = run.to_dict()
+    return {
+        "workers": workers,
+        "jobs": jobs,
+        "areas": areas,
+        "generate": generated,
+        "phases": result["phases"],
+        "solves": [{key: solve.get(key) for key in ("round", "model", "status", "gap", "variables", "constraints")}
+                   for solve in result["solves"]],
+        "solved": all(relaxations is not None for *_, relaxations in rounds),
+        "seconds": sum(result["phases"].values()),
+    }
+
+
+def configuration(record):
+    """What a result was measured on: the size, the solver backend, the decomposition and the event options"""
+    options = json.dumps(record.get("options"), sort_keys=True)
+    return record["workers"], record.get("backend"), record.get("decompose"), options
+
+
+def previous_results(path, current_revision):
+    """Latest result of another revision per configuration in the results file"""
+    if not path.exists():
+        return {}
+    with open(path) as file:
+        records = [json.loads(line) for line in file if line.strip()]
+    return {configuration(record): record for record in records if record["revision"] != current_revision}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the planner on synthetic events")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 200, 400, 800], help="numbers of workers")
+    parser.add_argument("--workers-per-job", type=int, default=6)
+    parser.add_argument("--areas", type=int, default=4)
+    parser.add_argument("--allergy-density", type=float, default=0.15)
+    parser.add_argument("--adoring-fraction", type=float, default=0.05)
+    parser.add_argument("--drivers", type=float, default=0.2)
+    parser.add_argument("--history-days", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", choices=SolverProfile.BACKENDS)
+    parser.add_argument("--decompose", action="store_true", default=None)
+    parser.add_argument("--database", action="store_true", help="also time the write-back into the database")
+    parser.add_argument("--results", type=Path, default=RESULTS, help="JSON lines file the results are appended to")
+    options = parser.parse_args()
+
+    settings = {"backend": options.backend, "decompose": options.decompose}
+    profile = SolverProfile.from_env().override({key: value for key, value in settings.items() if value is not None})
+    profile.msg = False
+    current = revision()
+    baseline = previous_results(options.results, current)
+
+    records = []
+    for workers in options.sizes:
+        record = {
+            "revision": current,
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "backend": profile.backend,
+            "decompose": profile.decompose,
+            "options": {name: getattr(options, name) for name in GENERATOR_OPTIONS},
+            **benchmark(workers, profile, options, options.database),
+        }
+        records.append(record)
+
+    print(f"{'workers':>8} {'jobs':>5} {'load':>8} {'build':>8} {'solve':>8} {'rides':>8} {'write':>8} {'total':>8}"
+          f" {'vs prev':>8}")
+    for record in records:
+        phases = record["phases"]
+        columns = [phases.get(name, 0.0) for name in ("load", "build", "solve", "rides", "write")]
+        previous = baseline.get(configuration(record))
+        change = f"{record['seconds'] / previous['seconds']:.2f}x" if previous and previous["seconds"] else "-"
+        print(f"{record['workers']:>8} {record['jobs']:>5} " + " ".join(f"{value:>8.3f}" for value in columns)
+              + f" {record['seconds']:>8.3f} {change:>8}")
+
+    options.results.parent.mkdir(parents=True, exist_ok=True)
+    with open(options.results, "a") as file:
+        for record in records:
+            file.write(json.dumps(record) + "\n")
+    print(f"Results appended to {options.results}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import datetime
+import random
+
+from src.history import EventHistory, checksum
+from src.snapshot import PlanSnapshot
+
+JOB_TYPES = ["GARDEN", "HOUSEWORK", "WOOD", "PAINTING", "WASHING_WINDOWS", "CLEANING"]
+ALLERGENS = ["DUST", "MITES", "POLLEN", "ANIMALS", "HAY", "CHEMICALS"]
+
+
+def pg_array(values):
+    return "{" + ",".join(values) + "}"
+
+
+def generate_event(workers=200, jobs=30, areas=4, allergy_density=0.15, adoring_fraction=0.05, drivers=0.2,
+                   history_days=3, seed=0):
+    """Synthetic plan of an event in the same shape as a snapshot loaded from the database.
+
+    Workers get every allergen with probability `allergy_density`, jobs half as often. `drivers` is the fraction of
+    workers with a car and `history_days` earlier plans of the event, each planned at random, feed the co-worker
+    history (forbids, forbidden jobs, scores and the previous day's plan).
+    """
+    rnd = random.Random(seed)
+    area_ids = [f"area{a}" for a in range(areas)]
+    requires_car = {area: a % 2 == 0 for a, area in enumerate(area_ids)}
+
+    job_ids = [f"job{j}" for j in range(jobs)]
+    job_properties = {}
+    for j, job in enumerate(job_ids):
+        min_workers = rnd.randint(3, 6)
+        max_workers = min_workers + rnd.randint(2, 4)
+        area = area_ids[j % areas]
+        job_properties[job] = {
+            "id": job,
+            "maxWorkers": max_workers,
+            "minWorkers": min_workers,
+            "strongWorkers": rnd.randint(0, 2),
+            "jobType": rnd.choice(JOB_TYPES),
+            "allergens": pg_array(a for a in ALLERGENS if rnd.random() < allergy_density / 2),
+            "requiresCar": requires_car[area],
+            "supportsAdoration": rnd.random() < 0.5,
+            "areaId": area,
+            "neededCars": max(0, (max_workers - min_workers) // 2 - 1),
+        }
+
+    worker_ids = [f"worker{w}" for w in range(workers)]
+    worker_rows = {}
+    for worker in worker_ids:
+        is_driver = rnd.random() < drivers
+        worker_rows[worker] = {
+            "id": worker,
+            "isStrong": rnd.random() < 0.3,
+            "workAllergies": pg_array(a for a in ALLERGENS if rnd.random() < allergy_density),
+            "isDriver": is_driver,
+            "isAdoring": rnd.random() < adoring_fraction,
+            "seats": rnd.choice([4, 5, 7]) if is_driver else None,
+        }
+
+    areas_rows = {}
+    for area in area_ids:
+        if requires_car[area]:
+            area_jobs = [job_properties[job] for job in job_ids if job_properties[job]["areaId"] == area]
+            required = (sum(job["minWorkers"] for job in area_jobs) + sum(job["maxWorkers"] for job in area_jobs)) // 2
+            areas_rows[area] = {"id": area, "requiredDrivers": required}
+
+    day = datetime.date(2025, 7, 1) + datetime.timedelta(days=history_days)
+    plans = {}
+    for d in range(history_days):
+        shuffled = rnd.sample(worker_ids, len(worker_ids))
+        plan_jobs = {}
+        for j, job in enumerate(job_ids):
+            taken = shuffled[:job_properties[job]["maxWorkers"]]
+            shuffled = shuffled[len(taken):]
+            plan_jobs[f"day{d}-{job}"] = {"job": job, "jobType": job_properties[job]["jobType"], "workers": taken}
+        plan_day = (day - datetime.timedelta(days=history_days - d)).isoformat()
+        plans[f"plan{d}"] = {"day": plan_day, "checksum": checksum(plan_jobs), "jobs": plan_jobs}
+    history = EventHistory(None, "event", f"plan{history_days}", day.isoformat(), plans)
+
+    active_jobs = {job: {"id": job, "activeJobId": f"active-{job}"} for job in job_ids}
+    return PlanSnapshot(
+        f"plan{history_days}", job_ids, job_properties, worker_rows, history.forbids(), history.forbidden_jobs(),
+        active_jobs, areas_rows, history.scores(job_properties), previous_assignments=history.previous_plan(),
+    )
@@ -1,35 +1,143 @@
 #!/usr/bin/env python
-from dotenv import load_dotenv
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from src.solver import generate_plan_from_message
+from src.config import getenv
 from src.rabbitmq_setup import setup_connection
+from src import metrics, worker
 import json
+import multiprocessing
+import time
 
-# Load environment variables from .env file in the project root
-env_path = Path(__file__).parent.parent.parent / '.env'
-load_dotenv(dotenv_path=env_path)
+# Number of plans generated in parallel, each in its own process
+PLANNER_WORKERS = int(getenv('PLANNER_WORKERS', '1'))
+# Start the worker processes with the solver stack imported before taking messages, instead of on the first plan
+PLANNER_PREWARM = getenv('PLANNER_PREWARM', '1') != '0'
+# File created once the planner takes messages and removed on exit, e.g. for a container health check
+PLANNER_READY_FILE = getenv('PLANNER_READY_FILE')
 
-channel, queue_name = setup_connection()
 
-def on_message(ch, method, properties, body):
+def on_done(ch, in_flight, key, plan_id, received, future):
+    # Runs on the connection's I/O thread, the only thread allowed to use the channel
+    delivery_tags = in_flight.pop(key)
+    error = future.exception()
+    if error is not None:
+        # A plan failing on its own input would fail again, one failing on the database is tried again once it is back
+        requeue = isinstance(error, worker.TransientError)
+        print(f'Plan {plan_id} failed{", requeueing the message" if requeue else ""}: {error!r}')
+        metrics.REGISTRY.observe(None, result="retry" if requeue else "error")
+        for delivery_tag in delivery_tags:
+            ch.basic_nack(delivery_tag=delivery_tag, requeue=requeue)
+        return
+    run = future.result()
+    # Time the message waited for a free planner worker
+    queue_wait = max(0.0, run["started"] - received)
+    result = "skipped" if run["skipped"] and not run["solves"] else "ok" if run["solved"] else "infeasible"
+    metrics.REGISTRY.observe(run, queue_wait, result=result)
+    metrics.log("plan_done", planId=plan_id, queueWait=queue_wait, seconds=run["seconds"],
+                coalesced=len(delivery_tags) - 1)
+    for delivery_tag in delivery_tags:
+        ch.basic_ack(delivery_tag=delivery_tag)
+
+
+def on_message(ch, method, properties, body, executor, in_flight):
+    received = time.time()
     print(f'Received message (delivery tag: {method.delivery_tag}): {body}')
-    # Get the plan ID from the message body - the body is json { "planId": 123 }
+    # Get the plan ID from the message body - the body is json { "planId": 123 }, optionally with solver settings
+    # { "planId": 123, "solver": { "backend": "highs", "threads": 4, "timeLimit": 60, "gap": 0.01 } } and a
+    # "diagnostics": true flag to store an infeasibility report even for a successful plan. Several days are planned
+    # in one run with { "planIds": [123, 124] } or { "eventId": 12 }, in parallel with "parallel": true. After an edit
+    # of a planned plan { "planId": 123, "replan": { "jobs": [...], "workers": [...] } } plans only the changed jobs
+    # and workers again
     try:
         message = json.loads(body)
         plan_id = message.get("planId")
-        if plan_id is None:
-            print("Missing 'planId' in message")
+        plan_ids = message.get("planIds")
+        event_id = message.get("eventId")
+        replan = message.get("replan")
+        if replan is not None and (plan_id is None or not isinstance(replan, dict)):
+            print("'replan' needs a 'planId' and has to be an object with 'jobs' and 'workers'")
             ch.basic_nack(delivery_tag=method.delivery_tag)
             return
-    except (ValueError, json.JSONDecodeError):
+        if plan_id is None and not plan_ids and event_id is None:
+            print("Missing 'planId', 'planIds' or 'eventId' in message")
+            ch.basic_nack(delivery_tag=method.delivery_tag)
+            return
+    except (ValueError, json.JSONDecodeError, AttributeError):
         print("Invalid message format")
         ch.basic_nack(delivery_tag=method.delivery_tag)
         return
 
-    generate_plan_from_message(plan_id)
-    ch.basic_ack(delivery_tag=method.delivery_tag)
+    # A message for plans that are already being planned (a double click, a redelivery) is acknowledged together
+    # with the running one instead of planning them again. Only identical requests coalesce: a re-plan, other
+    # solver settings or a diagnostics report asked for would otherwise be lost with the running one's result
+    diagnostics = bool(message.get("diagnostics"))
+    target = plan_id if plan_id is not None else plan_ids or {"eventId": event_id}
+    key = json.dumps([target, replan, message.get("solver"), diagnostics, bool(message.get("parallel"))],
+                     sort_keys=True)
+    if key in in_flight:
+        print(f'Plan {key} is already being planned, coalescing the message')
+        in_flight[key].append(method.delivery_tag)
+        return
+    in_flight[key] = [method.delivery_tag]
+
+    # The solve runs in a worker process so the I/O thread keeps serving heartbeats during long solves
+    if plan_id is not None:
+        future = executor.submit(worker.plan, plan_id, message.get("solver"), diagnostics, replan)
+    else:
+        plan_id = plan_ids or f"event {event_id}"
+        future = executor.submit(worker.plan_batch, plan_ids, event_id, message.get("solver"), diagnostics,
+                                 bool(message.get("parallel")))
+    future.add_done_callback(lambda f: ch.connection.add_callback_threadsafe(
+        partial(on_done, ch, in_flight, key, plan_id, received, f)))
+
+
+def set_ready(ready):
+    if ready:
+        metrics.READY.set()
+    else:
+        metrics.READY.clear()
+    if PLANNER_READY_FILE:
+        path = Path(PLANNER_READY_FILE)
+        if ready:
+            path.touch()
+        else:
+            path.unlink(missing_ok=True)
+
+
+def main():
+    started = time.perf_counter()
+    # A ready file left over from before a restart must not report the new process as ready
+    set_ready(False)
+    if PLANNER_PREWARM:
+        executor = ProcessPoolExecutor(max_workers=PLANNER_WORKERS, initializer=worker.warm_up,
+                                       initargs=(multiprocessing.Barrier(PLANNER_WORKERS),))
+        # Every worker gets one no-op task so all of them start (and warm up) now, while the consumer connects
+        warm = [executor.submit(worker.ready) for _ in range(PLANNER_WORKERS)]
+    else:
+        executor, warm = ProcessPoolExecutor(max_workers=PLANNER_WORKERS), []
+    metrics.serve()
+    with executor:
+        channel, queue_name = setup_connection()
+        for future in warm:
+            future.result()
+        channel.basic_qos(prefetch_count=PLANNER_WORKERS)
+        # Delivery tags of the messages waiting for each running plan, only used from the connection's I/O thread
+        in_flight = {}
+        channel.basic_consume(queue=queue_name,
+                              on_message_callback=partial(on_message, executor=executor, in_flight=in_flight),
+                              auto_ack=False)
+
+        startup = time.perf_counter() - started
+        metrics.REGISTRY.set_gauge("planner_startup_seconds", startup)
+        set_ready(True)
+        print(f' [*] Ready in {startup:.2f}s. Waiting for messages with {PLANNER_WORKERS} planner workers'
+              f'{" (warm)" if warm else ""}. To exit press CTRL+C')
+        try:
+            channel.start_consuming()
+        finally:
+            set_ready(False)
 
-channel.basic_consume(queue=queue_name, on_message_callback=on_message, auto_ack=False)
 
-print(' [*] Waiting for messages. To exit press CTRL+C')
-channel.start_consuming()
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""Export the solver input of a plan to a file, and plan from such a file without the database or RabbitMQ.
+
+    python replay.py export <planId> plan.json.gz
+    python replay.py run plan.json.gz [--backend highs] [--threads 4] [--time-limit 60] [--gap 0.01] [--decompose]
+"""
+import argparse
+import json
+import time
+
+from src import metrics
+from src.database import connection
+from src.history import HistoryStore
+from src.model import SolverProfile
+from src.rides import plan_rides, snapshot_ride_rows
+from src.snapshot import PlanSnapshot
+from src.solver import PLANNER_HISTORY, diagnose_rounds, plan_rounds
+
+
+def export(plan_id, path):
+    with connection() as conn:
+        snapshot = PlanSnapshot.load(conn, plan_id, HistoryStore() if PLANNER_HISTORY == "cache" else None)
+    snapshot.export(path)
+    print(f"Exported plan {plan_id} ({len(snapshot.jobs)} jobs, {len(snapshot.workers)} workers) to {path}")
+
+
+def replay(path, settings=None, diagnostics=False):
+    """Plan the snapshot in `path` like a message would, returns the summary of the run"""
+    started = time.perf_counter()
+    snapshot = PlanSnapshot.read(path)
+    run = metrics.start_run(snapshot.plan_id)
+    run.add_phase("load", time.perf_counter() - started)
+
+    profile = SolverProfile.from_env().override(settings)
+    rounds = plan_rounds(snapshot, profile)
+    reports = diagnose_rounds(rounds, profile, diagnostics)
+    assignments = {}
+    for _, _, round_assignments, _ in rounds:
+        for job, workers in round_assignments.items():
+            assignments.setdefault(job, []).extend(workers)
+    with metrics.phase("rides"):
+        rides, _, unseated = plan_rides(snapshot_ride_rows(snapshot, assignments))
+
+    run.set("solved", all(relaxations is not None for *_, relaxations in rounds))
+    run.set("assigned", sum(len(workers) for workers in assignments.values()))
+    run.set("relaxations", [relaxations for *_, relaxations in rounds])
+    run.set("rides", len(rides))
+    run.set("unseated", len(unseated))
+    run.set("diagnostics", reports)
+    run.set("assignments", assignments)
+    return run.to_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and replay plan snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="write the solver input of a plan to a file")
+    export_parser.add_argument("plan_id")
+    export_parser.add_argument("path")
+
+    run_parser = commands.add_parser("run", help="plan a snapshot file without the database")
+    run_parser.add_argument("path")
+    run_parser.add_argument("--backend", choices=SolverProfile.BACKENDS)
+    run_parser.add_argument("--threads", type=int)
+    run_parser.add_argument("--time-limit", type=float)
+    run_parser.add_argument("--gap", type=float)
+    run_parser.add_argument("--decompose", action="store_true", default=None)
+    run_parser.add_argument("--diagnostics", action="store_true")
+    run_parser.add_argument("--output", help="write the summary with the assignments to this JSON file")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export(args.plan_id, args.path)
+        return
+
+    settings = {"backend": args.backend, "threads": args.threads, "timeLimit": args.time_limit, "gap": args.gap,
+                "decompose": args.decompose}
+    summary = replay(args.path, {key: value for key, value in settings.items() if value is not None}, args.diagnostics)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(summary, file, indent=2, default=str)
+    summary.pop("assignments")
+    metrics.log("replay", **summary)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+import numpy as np
+
+
+def column(rows, key, dtype, default=0):
+    return np.fromiter(((row[key] if row[key] is not None else default) for row in rows), dtype=dtype,
+                       count=len(rows))
+
+
+class WorkerTable:
+    """Workers of a plan as NumPy columns, worker i of every column is `ids[i]`"""
+
+    __slots__ = ("ids", "index", "is_strong", "is_driver", "is_adoring", "seats")
+
+    def __init__(self, workers):
+        self.ids = list(workers)
+        self.index = {worker: i for i, worker in enumerate(self.ids)}
+        rows = [workers[worker] for worker in self.ids]
+        self.is_strong = column(rows, "isStrong", bool)
+        self.is_driver = column(rows, "isDriver", bool)
+        self.is_adoring = column(rows, "isAdoring", bool)
+        self.seats = column(rows, "seats", np.int64)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class JobTable:
+    """Jobs of a plan as NumPy columns, job j of every column is `ids[j]` and its area is `area_ids[area[j]]`"""
+
+    __slots__ = ("ids", "index", "max_workers", "min_workers", "strong_workers", "needed_cars", "requires_car",
+                 "supports_adoration", "area", "area_ids")
+
+    def __init__(self, jobs, job_properties):
+        self.ids = list(jobs)
+        self.index = {job: j for j, job in enumerate(self.ids)}
+        rows = [job_properties[job] for job in self.ids]
+        self.max_workers = column(rows, "maxWorkers", np.int64)
+        self.min_workers = column(rows, "minWorkers", np.int64)
+        self.strong_workers = column(rows, "strongWorkers", np.int64)
+        self.needed_cars = column(rows, "neededCars", np.int64)
+        self.requires_car = column(rows, "requiresCar", bool)
+        self.supports_adoration = column(rows, "supportsAdoration", bool)
+        self.area_ids = list(dict.fromkeys(row["areaId"] for row in rows))
+        area_index = {area: a for a, area in enumerate(self.area_ids)}
+        self.area = np.fromiter((area_index[row["areaId"]] for row in rows), dtype=np.int64, count=len(rows))
+
+    def __len__(self):
+        return len(self.ids)
@@ -0,0 +1,16 @@
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Settings come from the environment, .env files fill in the variables that are not set: the nearest one above this
+# package first, then the one of the project root. Loaded once on first import, modules read settings with `getenv`.
+ENV_PATH = Path(__file__).parent.parent.parent / ".env"
+
+load_dotenv()
+load_dotenv(dotenv_path=ENV_PATH)
+
+
+def getenv(name, default=None):
+    """Value of an environment variable after the .env files were loaded"""
+    return os.getenv(name, default)
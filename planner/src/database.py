@@ -0,0 +1,134 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2.extensions
+import psycopg2.extras
+import psycopg2.pool
+
+from src.config import getenv
+
+POSTGRES_USER = getenv("POSTGRES_USER")
+POSTGRES_PASSWORD = getenv("POSTGRES_PASSWORD")
+POSTGRES_DB = getenv("POSTGRES_DB")
+POSTGRES_HOST = getenv("POSTGRES_HOST", "localhost")
+POSTGRES_PORT = getenv("POSTGRES_PORT", "5432")
+DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+PLANNER_DB_POOL_MAX = int(getenv("PLANNER_DB_POOL_MAX", "4"))
+# Connections kept open, the pool closes every connection given back above it. A plan is loaded on several
+# connections at once, keeping all of them open avoids connecting again for every plan.
+PLANNER_DB_POOL_MIN = int(getenv("PLANNER_DB_POOL_MIN", str(PLANNER_DB_POOL_MAX)))
+
+PARAMETER = re.compile(r"%\((\w+)\)s")
+
+_pool = None
+_pool_pid = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+_stats = {"connections_opened": 0, "checkouts": 0, "wait_seconds": 0.0, "prepared_statements": 0}
+
+
+class PreparingConnection(psycopg2.extensions.connection):
+    """Connection remembering which statements it has already prepared on the server"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        _stats["connections_opened"] += 1
+
+
+class PreparedCursor(psycopg2.extras.RealDictCursor):
+    """Dict cursor that runs queries with named parameters as server-side prepared statements.
+
+    Every distinct query is prepared once per connection, later executions only send the parameters.
+    """
+
+    def execute(self, query, vars=None):
+        if not isinstance(vars, dict) or not hasattr(self.connection, "prepared"):
+            return super().execute(query, vars)
+
+        names = list(dict.fromkeys(PARAMETER.findall(query)))
+        statement = "planner_" + hashlib.sha1(query.encode()).hexdigest()[:16]
+        if statement not in self.connection.prepared:
+            numbered = PARAMETER.sub(lambda match: f"${names.index(match.group(1)) + 1}", query)
+            super().execute(f"PREPARE {statement} AS {numbered.strip().rstrip(';')}")
+            self.connection.prepared.add(statement)
+            _stats["prepared_statements"] += 1
+        if not names:
+            return super().execute(f"EXECUTE {statement}")
+        arguments = ", ".join(f"%({name})s" for name in names)
+        return super().execute(f"EXECUTE {statement} ({arguments})", vars)
+
+
+def get_pool():
+    """Return the connection pool of this process, creating it on first use (also after a fork)"""
+    global _pool, _pool_pid, _pool_slots
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = psycopg2.pool.ThreadedConnectionPool(
+                PLANNER_DB_POOL_MIN, PLANNER_DB_POOL_MAX, DATABASE_URL,
+                options="-c search_path=public", connection_factory=PreparingConnection
+            )
+            _pool_pid = os.getpid()
+            _pool_slots = threading.BoundedSemaphore(PLANNER_DB_POOL_MAX)
+        return _pool
+
+
+@contextmanager
+def connection():
+    """Borrow a connection from the pool, waiting while all of them are in use"""
+    pool = get_pool()
+    start = time.perf_counter()
+    _pool_slots.acquire()
+    _stats["wait_seconds"] += time.perf_counter() - start
+    _stats["checkouts"] += 1
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        if not conn.closed and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+        pool.putconn(conn, close=bool(conn.closed))
+        _pool_slots.release()
+
+
+@contextmanager
+def advisory_lock(conn, name, wait=False):
+    """Hold the session advisory lock `name` on the connection during the block, yields whether it was acquired.
+
+    Without `wait` the lock is not waited for, a session of another planner already holding it makes the block see
+    False. With `wait` the block runs once the other session released it.
+    """
+    cursor = conn.cursor()
+    if wait:
+        cursor.execute("SELECT pg_advisory_lock(hashtext(%s))", (name,))
+        acquired = True
+    else:
+        cursor.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (name,))
+        acquired = cursor.fetchone()[0]
+    # Session locks outlive the transaction, ending it leaves the connection ready for the block
+    conn.rollback()
+    try:
+        yield acquired
+    finally:
+        if acquired and not conn.closed:
+            conn.rollback()
+            cursor = conn.cursor()
+            cursor.execute("SELECT pg_advisory_unlock(hashtext(%s))", (name,))
+            conn.rollback()
+
+
+def pool_stats():
+    """Current pool usage together with the counters collected since the process started"""
+    stats = dict(_stats)
+    if _pool is not None and _pool_pid == os.getpid():
+        stats["in_use"] = len(_pool._used)
+        stats["idle"] = len(_pool._pool)
+    else:
+        stats["in_use"] = stats["idle"] = 0
+    stats["min_size"] = PLANNER_DB_POOL_MIN
+    stats["max_size"] = PLANNER_DB_POOL_MAX
+    return stats
@@ -0,0 +1,135 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src import metrics
+from src.config import getenv
+from src.model import ACCEPTED_STATUSES, SparseModel
+from src.planning import PLANNER_ELASTIC, RELAXATION_WEIGHTS, generate_plan
+from src.viability import Viability
+
+# Number of processes solving the areas of a decomposed plan in parallel
+PLANNER_DECOMPOSE_WORKERS = int(getenv("PLANNER_DECOMPOSE_WORKERS", str(os.cpu_count() or 1)))
+
+
+def area_costs(snapshot, viability, viable, elastic):
+    """Cheapest viable job of every (area x worker), infinite where the worker fits no job of the area"""
+    cost = viability.costs(snapshot.scores, RELAXATION_WEIGHTS["forbidden_jobs"] if elastic else 0)
+    cost[~viable] = np.inf
+
+    jobs_of_area = {}
+    for j, job in enumerate(viability.jobs):
+        jobs_of_area.setdefault(snapshot.job_properties[job]["areaId"], []).append(j)
+    return {area: cost[rows].min(axis=0) for area, rows in jobs_of_area.items()}, jobs_of_area
+
+
+def partition(snapshot, first_round=True, elastic=True, profile=None):
+    """Assign every worker to one area with a small coordination MIP over the aggregated rules of each area.
+
+    Workers are only coupled across areas by the one job per worker rule, so once every worker has an area the
+    areas are independent plans. Returns {area: (jobs, workers)} or None when no partition was found.
+    """
+    build_started = time.perf_counter()
+    jobs, job_properties, workers = snapshot.jobs, snapshot.job_properties, snapshot.workers
+    viability = Viability(jobs, job_properties, workers, snapshot.forbidden_jobs)
+    viable = viability.matrix(relax_forbidden=elastic)
+    costs, jobs_of_area = area_costs(snapshot, viability, viable, elastic)
+
+    worker_table = viability.worker_table
+    model = SparseModel()
+    area_workers, area_columns = [], []
+    for area, rows in jobs_of_area.items():
+        area_jobs = [job_properties[viability.jobs[j]] for j in rows]
+        candidates = np.flatnonzero(np.isfinite(costs[area]))
+        area_vars = model.add_variables([(area, viability.workers[w]) for w in candidates.tolist()],
+                                        costs[area][candidates].tolist())
+        area_workers.append(candidates)
+        area_columns.append(area_vars)
+        # Column of each worker in this area, every worker viable for one of its jobs has one
+        column_of = np.full(len(worker_table), -1)
+        column_of[candidates] = area_vars
+
+        model.add_row(area_vars.tolist(), upper=sum(job["maxWorkers"] for job in area_jobs))
+        # Necessary conditions per job, the aggregated rows alone leave single jobs short or overfull: enough fitting
+        # (strong) workers, and no more workers fitting only this job than it takes
+        single = viable[rows].sum(axis=0) == 1
+        for j in rows:
+            job = job_properties[viability.jobs[j]]
+            model.add_row(column_of[viable[j] & single].tolist(), upper=job["maxWorkers"])
+            if first_round:
+                model.add_row(column_of[viable[j] & worker_table.is_strong].tolist(), lower=job["strongWorkers"])
+            else:
+                model.add_row(column_of[viable[j]].tolist(), lower=job["minWorkers"])
+
+        if first_round:
+            strongman = area_vars[worker_table.is_strong[candidates]].tolist()
+            model.add_row(strongman, lower=sum(job["strongWorkers"] for job in area_jobs))
+            # Drivers count with the seats of their car when they fit one of the area's jobs that need a car
+            car_jobs = [j for j in rows if viability.job_table.requires_car[j]]
+            drives = worker_table.is_driver[candidates] & viable[car_jobs][:, candidates].any(axis=0)
+            drivers, seats = area_vars[drives].tolist(), worker_table.seats[candidates[drives]].tolist()
+            cars = sum(job["neededCars"] for job in area_jobs)
+            # The area driver minimums only replace the cars of the jobs when an area's own plan cannot find them
+            if elastic:
+                model.add_row(drivers + [model.add_slack("neededCars", area, RELAXATION_WEIGHTS["neededCars"])],
+                              seats + [1], lower=cars)
+            else:
+                model.add_row(drivers, seats, lower=cars)
+        else:
+            model.add_row(area_vars.tolist(), lower=sum(job["minWorkers"] for job in area_jobs))
+
+    # One area per worker
+    worker_cols = np.concatenate(area_workers) if area_workers else np.zeros(0, dtype=np.int64)
+    columns = np.concatenate(area_columns) if area_columns else np.zeros(0, dtype=np.int64)
+    by_worker = np.argsort(worker_cols, kind="stable")
+    worker_bounds = np.concatenate(([0], np.cumsum(np.bincount(worker_cols, minlength=len(worker_table)))))
+    for w in range(len(worker_table)):
+        model.add_row(columns[by_worker[worker_bounds[w]:worker_bounds[w + 1]]].tolist(), lower=1, upper=1)
+
+    build_seconds = time.perf_counter() - build_started
+    status, solution = model.solve(profile)
+    metrics.record_solve(first_round, model.info, build_seconds, model="coordination")
+    print(f"Coordination of {len(jobs_of_area)} areas: {model.info}")
+    if status not in ACCEPTED_STATUSES:
+        return None
+    areas_of = model.assignments(solution)
+    return {
+        area: ([viability.jobs[j] for j in rows], areas_of.get(area, []))
+        for area, rows in jobs_of_area.items()
+    }
+
+
+def generate_plan_decomposed(snapshot, first_round=True, elastic=PLANNER_ELASTIC, profile=None, start=()):
+    """Plan every area in its own process after partitioning the workers, same result format as `generate_plan`.
+
+    An area without a feasible plan falls back to the monolithic model, warm started from the area plans found.
+    """
+    parts = partition(snapshot, first_round, elastic, profile)
+    if parts is None:
+        print("No area partition found, solving the monolithic model")
+        return generate_plan(snapshot, first_round, elastic, profile, start)
+    if len(parts) == 1:
+        return generate_plan(snapshot, first_round, elastic, profile, start)
+
+    with ProcessPoolExecutor(max_workers=min(PLANNER_DECOMPOSE_WORKERS, len(parts))) as executor:
+        futures = {
+            area: executor.submit(metrics.collect, generate_plan, snapshot.restrict(jobs, workers), first_round,
+                                  elastic, profile, start)
+            for area, (jobs, workers) in parts.items()
+        }
+        results = {}
+        for area, future in futures.items():
+            results[area], collected = future.result()
+            metrics.merge(collected)
+
+    assignments, relaxations = {}, []
+    failed = [area for area, (_, area_relaxations) in results.items() if area_relaxations is None]
+    for area_assignments, area_relaxations in results.values():
+        assignments.update(area_assignments)
+        relaxations.extend(area_relaxations or [])
+    if failed:
+        print(f"Areas {failed} have no feasible plan, solving the monolithic model")
+        return generate_plan(snapshot, first_round, elastic, profile, (assignments, *start))
+    return assignments, relaxations
@@ -0,0 +1,127 @@
+import numpy as np
+
+from src.model import ACCEPTED_STATUSES, SparseModel
+from src.viability import Viability
+
+
+def job_problems(viability, viable, job_properties, first_round, elastic):
+    """Jobs that cannot be staffed from their viable workers alone, with the rules that block the others"""
+    worker_table = viability.worker_table
+    strong = worker_table.is_strong
+    seats = np.where(worker_table.is_driver, worker_table.seats, 0)
+    allergy_blocked, adoration_blocked, forbidden_blocked = viability.blocked_counts(relax_forbidden=elastic)
+
+    problems = []
+    for j, job in enumerate(viability.jobs):
+        properties = job_properties[job]
+        count = int(viable[j].sum())
+        issues = []
+        if count == 0:
+            issues.append("no_viable_workers")
+        elif not first_round and count < properties["minWorkers"]:
+            issues.append("too_few_viable_workers")
+        if first_round and int((viable[j] & strong).sum()) < properties["strongWorkers"]:
+            issues.append("too_few_strong_workers")
+        if first_round and properties["requiresCar"] and int(seats[viable[j]].sum()) < properties["neededCars"]:
+            issues.append("too_few_seats")
+        if not issues:
+            continue
+        problems.append({
+            "job": job,
+            "issues": issues,
+            "viableWorkers": count,
+            "minWorkers": properties["minWorkers"],
+            "maxWorkers": properties["maxWorkers"],
+            "strongWorkers": properties["strongWorkers"],
+            "blocked": {
+                "allergies": int(allergy_blocked[j]),
+                "adoration": int(adoration_blocked[j]),
+                "forbidden": int(forbidden_blocked[j]),
+            },
+            "allergens": viability.allergens_of_job(job),
+        })
+    return problems
+
+
+def explain(viability, viable, first_round, profile=None):
+    """Smallest set of rules to relax for a plan to exist, found with a model where every rule has a unit slack"""
+    jobs, job_table, worker_table = viability.jobs, viability.job_table, viability.worker_table
+
+    # One variable per viable (job, worker) pair in job order, like the plan's model
+    job_rows, worker_cols = np.nonzero(viable)
+    model = SparseModel()
+    columns = model.add_variables(
+        [(jobs[j], viability.workers[w]) for j, w in zip(job_rows.tolist(), worker_cols.tolist())],
+        [0] * len(job_rows))
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(job_rows, minlength=len(jobs)))))
+
+    for j, job in enumerate(jobs):
+        job_vars, job_workers = columns[bounds[j]:bounds[j + 1]], worker_cols[bounds[j]:bounds[j + 1]]
+        staff = job_vars.tolist()
+        model.add_row(staff + [model.add_slack("maxWorkers", job, 1)], [1] * len(staff) + [-1],
+                      upper=int(job_table.max_workers[j]))
+        if first_round:
+            strong = job_vars[worker_table.is_strong[job_workers]].tolist()
+            model.add_row(strong + [model.add_slack("strongWorkers", job, 1)], lower=int(job_table.strong_workers[j]))
+            if job_table.requires_car[j]:
+                is_driver = worker_table.is_driver[job_workers]
+                drivers, seats = job_vars[is_driver].tolist(), worker_table.seats[job_workers[is_driver]].tolist()
+                model.add_row(drivers + [model.add_slack("neededCars", job, 1)], seats + [1],
+                              lower=int(job_table.needed_cars[j]))
+        else:
+            model.add_row(staff + [model.add_slack("minWorkers", job, 1)], lower=int(job_table.min_workers[j]))
+
+    by_worker = np.argsort(worker_cols, kind="stable")
+    worker_bounds = np.concatenate(([0], np.cumsum(np.bincount(worker_cols, minlength=len(worker_table)))))
+    for w, worker in enumerate(viability.workers):
+        assigned = columns[by_worker[worker_bounds[w]:worker_bounds[w + 1]]].tolist()
+        model.add_row(assigned + [model.add_slack("unassigned_worker", worker, 1)], lower=1, upper=1)
+
+    status, solution = model.solve(profile)
+    if status not in ACCEPTED_STATUSES:
+        return None
+    return model.relaxations(solution)
+
+
+def diagnose(snapshot, first_round=True, elastic=True, profile=None):
+    """Structured report of what keeps a planning round from being feasible, built from the snapshot only.
+
+    Lists the aggregate shortages, the jobs that cannot be staffed from their viable workers and the smallest set of
+    job and worker rules that have to be relaxed (`binding`), so the web app can show why a plan failed.
+    """
+    jobs, job_properties, workers = snapshot.jobs, snapshot.job_properties, snapshot.workers
+    viability = Viability(jobs, job_properties, workers, snapshot.forbidden_jobs)
+    viable = viability.matrix(relax_forbidden=elastic)
+
+    strong = sum(1 for worker in workers.values() if worker["isStrong"])
+    drivers = sum(1 for worker in workers.values() if worker["isDriver"])
+    totals = {
+        "minWorkers": sum(job_properties[job]["minWorkers"] for job in jobs),
+        "maxWorkers": sum(job_properties[job]["maxWorkers"] for job in jobs),
+        "strongWorkers": sum(job_properties[job]["strongWorkers"] for job in jobs),
+        "neededCars": sum(job_properties[job]["neededCars"] for job in jobs),
+    }
+
+    shortages = []
+    if len(workers) > totals["maxWorkers"]:
+        shortages.append({"rule": "maxWorkers", "needed": len(workers), "available": totals["maxWorkers"]})
+    if not first_round and len(workers) < totals["minWorkers"]:
+        shortages.append({"rule": "minWorkers", "needed": totals["minWorkers"], "available": len(workers)})
+    if first_round and strong < totals["strongWorkers"]:
+        shortages.append({"rule": "strongWorkers", "needed": totals["strongWorkers"], "available": strong})
+
+    jobless = [viability.workers[w] for w in np.flatnonzero(~viable.any(axis=0))]
+    return {
+        "planId": snapshot.plan_id,
+        "round": 1 if first_round else 2,
+        "elastic": elastic,
+        "workers": len(workers),
+        "jobs": len(jobs),
+        "strongWorkers": strong,
+        "drivers": drivers,
+        "totals": totals,
+        "shortages": shortages,
+        "jobProblems": job_problems(viability, viable, job_properties, first_round, elastic),
+        "workersWithoutJob": jobless,
+        "binding": explain(viability, viable, first_round, profile),
+    }
@@ -0,0 +1,42 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from src.history import PLANNER_CACHE_DIR
+from src.snapshot import json_value
+
+
+def fingerprint(snapshot):
+    """Hash of every solver input of the snapshot, independent of the order the database returned the rows in"""
+    data = snapshot.to_dict()
+    data["jobs"] = sorted(data["jobs"])
+    data["forbids"] = sorted(data["forbids"])
+    data["scores"] = sorted(data["scores"])
+    data["forbiddenJobs"] = {worker: sorted(jobs) for worker, jobs in data["forbiddenJobs"].items()}
+    data["previousAssignments"] = {job: sorted(workers) for job, workers in data["previousAssignments"].items()}
+    encoded = json.dumps(data, sort_keys=True, default=json_value)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class FingerprintStore:
+    """Fingerprint of the inputs each plan had right after it was last stored, one small file per plan"""
+
+    def __init__(self, directory=PLANNER_CACHE_DIR):
+        self.directory = Path(directory)
+
+    def _path(self, plan_id):
+        return self.directory / f"fingerprint-{plan_id}"
+
+    def get(self, plan_id):
+        try:
+            return self._path(plan_id).read_text().strip()
+        except OSError:
+            return None
+
+    def put(self, plan_id, value):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(plan_id)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(value)
+        os.replace(tmp, path)
@@ -0,0 +1,48 @@
+import numpy as np
+
+
+def forbid_pairs(forbids, worker_index):
+    """Unique unordered pairs of dense worker indices of the forbids, pairs with a worker outside the plan dropped"""
+    pairs = set()
+    for forbid, friend in forbids:
+        a, b = worker_index.get(forbid), worker_index.get(friend)
+        if a is not None and b is not None and a != b:
+            pairs.add((min(a, b), max(a, b)))
+    return np.array(sorted(pairs), dtype=np.int64).reshape(-1, 2)
+
+
+def clique_cover(pairs):
+    """Cover the edges of a graph given as sorted (a, b) pairs with cliques grown greedily from every uncovered edge"""
+    neighbours = {}
+    for a, b in pairs:
+        neighbours.setdefault(a, set()).add(b)
+        neighbours.setdefault(b, set()).add(a)
+    covered = set()
+    cliques = []
+    for a, b in pairs:
+        if (a, b) in covered:
+            continue
+        clique = [a, b]
+        candidates = neighbours[a] & neighbours[b]
+        while candidates:
+            # The candidate adjacent to most of the others leaves the most room to grow the clique further
+            member = max(candidates, key=lambda worker: (len(neighbours[worker] & candidates), -worker))
+            clique.append(member)
+            candidates &= neighbours[member]
+        clique.sort()
+        covered.update((u, v) for i, u in enumerate(clique) for v in clique[i + 1:])
+        cliques.append(clique)
+    return cliques
+
+
+def forbid_cliques(pairs, viable):
+    """Yield (job index, cliques of worker indices) for every job with a forbidden pair viable for it.
+
+    Only the pairs whose workers are both viable for a job can meet there, so every job gets the clique cover of its
+    own forbid graph and at most one worker of each clique may work the job.
+    """
+    if not len(pairs):
+        return
+    together = viable[:, pairs[:, 0]] & viable[:, pairs[:, 1]]
+    for j in np.flatnonzero(together.any(axis=1)):
+        yield int(j), clique_cover(pairs[together[j]].tolist())
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+from collections import Counter
+from pathlib import Path
+
+from src.config import getenv
+from src.queries import select_plan_event, select_event_plans, select_plan_assignments
+
+PLANNER_CACHE_DIR = Path(getenv("PLANNER_CACHE_DIR", Path(__file__).parent.parent / ".cache"))
+
+
+class HistoryStore:
+    """Co-worker history of every event, kept in a local cache file per event and updated incrementally.
+
+    Each file holds the assignments of every plan of the event grouped by active job. On load the cached plans
+    are checked against a checksum of their assignments in the database, deleted plans are dropped and new or edited
+    plans are re-read with a single indexed query per plan, so the full history is never aggregated in SQL.
+    """
+
+    def __init__(self, directory=PLANNER_CACHE_DIR):
+        self.directory = Path(directory)
+
+    def _path(self, event_id):
+        return self.directory / f"history-{event_id}.json"
+
+    def _read(self, event_id):
+        try:
+            with open(self._path(event_id)) as file:
+                return json.load(file)["plans"]
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _write(self, event_id, plans):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(event_id)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w") as file:
+            json.dump({"plans": plans}, file)
+        os.replace(tmp, path)
+
+    def load(self, dict_cursor, plan_id):
+        """Synchronize the cached history of the plan's event with the database and return it"""
+        dict_cursor.execute(select_plan_event, {"planId": plan_id})
+        plan = dict_cursor.fetchone()
+        event_id, day = plan["eventId"], plan["day"].isoformat()
+
+        dict_cursor.execute(select_event_plans, {"eventId": event_id})
+        stored = {row["id"]: row for row in dict_cursor.fetchall()}
+
+        plans = self._read(event_id)
+        changed = False
+        for id in list(plans):
+            if id not in stored:
+                del plans[id]
+                changed = True
+        for id, row in stored.items():
+            cached = plans.get(id)
+            if cached is not None and cached.get("checksum") == row["checksum"]:
+                continue
+            dict_cursor.execute(select_plan_assignments, {"planId": id})
+            plans[id] = plan_entry(row["day"].isoformat(), dict_cursor.fetchall())
+            changed = True
+
+        if changed:
+            self._write(event_id, plans)
+        return EventHistory(self, event_id, plan_id, day, plans)
+
+
+def plan_entry(day, rows):
+    jobs = {}
+    for row in rows:
+        job = jobs.setdefault(row["activeJobId"], {"job": row["job"], "jobType": row["jobType"], "workers": []})
+        job["workers"].append(row["worker"])
+    return {"day": day, "checksum": checksum(jobs), "jobs": jobs}
+
+
+def checksum(jobs):
+    """Checksum of a cached plan's (active job, worker) assignments, the same as the one of `select_event_plans`.
+
+    It changes with every added, removed or moved assignment, also when the number of assignments stays the same.
+    """
+    pairs = sorted((active_job, worker) for active_job, job in jobs.items() for worker in job["workers"])
+    if not pairs:
+        return None
+    return hashlib.md5(",".join(f"{active_job}:{worker}" for active_job, worker in pairs).encode()).hexdigest()
+
+
+class EventHistory:
+    """History of one event as seen from the day of the planned plan"""
+
+    def __init__(self, store, event_id, plan_id, day, plans):
+        self.store = store
+        self.event_id = event_id
+        self.plan_id = plan_id
+        self.day = day
+        self.plans = plans
+
+    def for_plan(self, plan_id, day):
+        """History of the same event as seen from another plan, sharing the plans recorded in memory"""
+        return EventHistory(self.store, self.event_id, plan_id, day, self.plans)
+
+    def _earlier_jobs(self):
+        return [job for plan in self.plans.values() if plan["day"] < self.day for job in plan["jobs"].values()]
+
+    def _threshold(self):
+        earlier_plans = sum(1 for plan in self.plans.values() if plan["day"] < self.day and plan["jobs"])
+        return earlier_plans // 2 + 1
+
+    def _frequent_pairs(self):
+        pairs = Counter()
+        for job in self._earlier_jobs():
+            for worker in job["workers"]:
+                for friend in job["workers"]:
+                    pairs[(worker, friend)] += 1
+        threshold = self._threshold()
+        return [pair for pair, count in pairs.items() if count >= threshold]
+
+    def forbids(self):
+        """Pairs of workers who worked together on more than half of the earlier days"""
+        return [(worker, friend) for worker, friend in self._frequent_pairs() if worker > friend]
+
+    def forbidden_jobs(self):
+        """Jobs each worker may not return to, the jobs of their frequent co-workers including their own"""
+        jobs_of = {}
+        for job in self._earlier_jobs():
+            for worker in job["workers"]:
+                jobs_of.setdefault(worker, set()).add(job["job"])
+        forbidden = {}
+        for worker, friend in self._frequent_pairs():
+            forbidden.setdefault(worker, set()).update(jobs_of.get(friend, ()))
+        return {worker: sorted(jobs) for worker, jobs in forbidden.items()}
+
+    def scores(self, job_properties):
+        """Number of earlier assignments of each worker to the job type of each planned job"""
+        counts = Counter()
+        for job in self._earlier_jobs():
+            for worker in job["workers"]:
+                counts[(worker, job["jobType"])] += 1
+        jobs_of_type = {}
+        for job, properties in job_properties.items():
+            jobs_of_type.setdefault(properties["jobType"], []).append(job)
+        return {
+            (job, worker): count
+            for (worker, job_type), count in counts.items() for job in jobs_of_type.get(job_type, ())
+        }
+
+    def previous_plan(self):
+        """Assignments ({job: [workers]}) of the latest earlier plan of the event"""
+        earlier = [plan for plan in self.plans.values() if plan["day"] < self.day and plan["jobs"]]
+        if not earlier:
+            return {}
+        latest = max(earlier, key=lambda plan: plan["day"])
+        assignments = {}
+        for job in latest["jobs"].values():
+            assignments.setdefault(job["job"], []).extend(job["workers"])
+        return assignments
+
+    def release(self, workers):
+        """Drop the assignments of `workers` from the planned plan's cached history, the workers are planned again"""
+        plan = self.plans.get(self.plan_id)
+        if plan is None:
+            return
+        for job in plan["jobs"].values():
+            job["workers"] = [worker for worker in job["workers"] if worker not in workers]
+        plan["checksum"] = checksum(plan["jobs"])
+
+    def record(self, assignments, active_jobs, job_properties):
+        """Add committed assignments ({job: [workers]}) of the planned plan to the cached history"""
+        plan = self.plans.setdefault(self.plan_id, {"day": self.day, "checksum": None, "jobs": {}})
+        for job, workers in assignments.items():
+            active_job = active_jobs[job]["activeJobId"]
+            entry = plan["jobs"].setdefault(
+                active_job, {"job": job, "jobType": job_properties[job]["jobType"], "workers": []})
+            entry["workers"].extend(workers)
+        plan["checksum"] = checksum(plan["jobs"])
+        self.store._write(self.event_id, self.plans)
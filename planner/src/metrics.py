@@ -0,0 +1,200 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.config import getenv
+
+# Port of the Prometheus endpoint of the consumer, the endpoint is disabled when unset
+PLANNER_METRICS_PORT = getenv("PLANNER_METRICS_PORT")
+
+_current = None
+
+
+class PlanMetrics:
+    """Phase timers, model sizes and counters of one plan run, sent back from the worker process as a dict"""
+
+    def __init__(self, plan_id):
+        self.plan_id = plan_id
+        self.started = time.time()
+        self.phases = {}
+        self.solves = []
+        self.values = {}
+
+    def add_phase(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def record_solve(self, first_round, info, model="plan"):
+        self.solves.append({"round": 1 if first_round else 2, "model": model, **info})
+
+    def set(self, name, value):
+        self.values[name] = value
+
+    def to_dict(self):
+        return {
+            "planId": self.plan_id,
+            "started": self.started,
+            "seconds": time.time() - self.started,
+            "phases": self.phases,
+            "solves": self.solves,
+            **self.values,
+        }
+
+
+def start_run(plan_id):
+    """Start collecting the metrics of a plan run in this process"""
+    global _current
+    _current = PlanMetrics(plan_id)
+    return _current
+
+
+def phase(name):
+    """Time a phase of the current run, without a run the block is only executed"""
+    return _current.phase(name) if _current is not None else _noop()
+
+
+@contextmanager
+def _noop():
+    yield
+
+
+def record_solve(first_round, info, build_seconds, model="plan"):
+    """Record the model size, status and gap of a solve together with the build and solve times.
+
+    `model` tells the plan of a round (or an area of it) from the coordination model of a decomposed round.
+    """
+    if _current is not None:
+        _current.add_phase("build", build_seconds)
+        _current.add_phase("solve", info.get("seconds", 0.0))
+        _current.record_solve(first_round, info, model)
+
+
+def collect(function, *args):
+    """Run `function(*args)` in a worker process with metrics of its own, returns the result and the metrics.
+
+    The phases and solves of the child's run are passed to `merge` in the parent, whose run they belong to.
+    """
+    global _current
+    parent, _current = _current, PlanMetrics(None)
+    try:
+        result = function(*args)
+        return result, {"phases": _current.phases, "solves": _current.solves}
+    finally:
+        _current = parent
+
+
+def merge(collected):
+    """Add the phases and solves collected in a worker process to the current run, phase times are summed"""
+    if _current is not None:
+        for name, seconds in collected["phases"].items():
+            _current.add_phase(name, seconds)
+        _current.solves.extend(collected["solves"])
+
+
+def log(event, **fields):
+    """Print a structured log line"""
+    print(json.dumps({"event": event, "time": time.time(), **fields}, default=str))
+
+
+class Registry:
+    """Aggregated metrics of every plan run of the consumer, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.plans = {}
+        self.phase_seconds = {}
+        self.phase_count = {}
+        self.queue_wait = [0.0, 0]
+        self.rows = {}
+        self.gauges = {}
+
+    def set_gauge(self, name, value):
+        with self.lock:
+            self.gauges[name] = {(): value}
+
+    def observe(self, run, queue_wait=None, result="ok"):
+        with self.lock:
+            self.plans[result] = self.plans.get(result, 0) + 1
+            if queue_wait is not None:
+                self.queue_wait[0] += queue_wait
+                self.queue_wait[1] += 1
+            if run is None:
+                return
+            for name, seconds in run["phases"].items():
+                self.phase_seconds[name] = self.phase_seconds.get(name, 0.0) + seconds
+                self.phase_count[name] = self.phase_count.get(name, 0) + 1
+            for table, count in run.get("rows", {}).items():
+                self.rows[table] = self.rows.get(table, 0) + count
+            self.gauges["planner_last_plan_seconds"] = {(): run["seconds"]}
+            for key in ("variables", "constraints", "status", "gap", "seconds"):
+                values = {(("round", str(solve["round"])), ("model", solve.get("model", "plan"))): solve[key]
+                          for solve in run["solves"] if solve.get(key) is not None}
+                self.gauges[f"planner_solver_{key}"] = values
+            for name, value in run.get("pool", {}).items():
+                self.gauges[f"planner_db_pool_{name}"] = {(): value}
+
+    def render(self):
+        with self.lock:
+            lines = ["# TYPE planner_plans_total counter"]
+            lines += [f'planner_plans_total{{result="{result}"}} {count}' for result, count in self.plans.items()]
+            lines.append("# TYPE planner_phase_seconds summary")
+            for name, seconds in self.phase_seconds.items():
+                lines.append(f'planner_phase_seconds_sum{{phase="{name}"}} {seconds}')
+                lines.append(f'planner_phase_seconds_count{{phase="{name}"}} {self.phase_count[name]}')
+            lines.append("# TYPE planner_queue_wait_seconds summary")
+            lines.append(f"planner_queue_wait_seconds_sum {self.queue_wait[0]}")
+            lines.append(f"planner_queue_wait_seconds_count {self.queue_wait[1]}")
+            lines.append("# TYPE planner_rows_written_total counter")
+            lines += [f'planner_rows_written_total{{table="{table}"}} {count}' for table, count in self.rows.items()]
+            for name, values in self.gauges.items():
+                lines.append(f"# TYPE {name} gauge")
+                for labels, value in values.items():
+                    label_text = ",".join(f'{key}="{label}"' for key, label in labels)
+                    lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+            return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Set once the worker processes are warm and the consumer takes messages
+READY = threading.Event()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/ready":
+            self.send_response(200 if READY.is_set() else 503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=PLANNER_METRICS_PORT):
+    """Serve REGISTRY at /metrics and READY at /ready of http://0.0.0.0:<port> in a daemon thread, off without a port"""
+    if not port:
+        return None
+    server = ThreadingHTTPServer(("0.0.0.0", int(port)), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Metrics available on port {port} at /metrics, readiness at /ready")
+    return server
@@ -0,0 +1,290 @@
+import time
+
+import numpy as np
+from pulp import (
+    LpAffineExpression, LpConstraint, LpConstraintEQ, LpConstraintGE, LpConstraintLE, LpMinimize, LpProblem,
+    LpSolutionInfeasible, LpSolutionIntegerFeasible, LpSolutionNoSolutionFound, LpSolutionOptimal, LpVariable,
+    PULP_CBC_CMD
+)
+
+from src.config import getenv
+
+INF = float("inf")
+
+# Solution statuses for which the solution can be saved, a time limited solve may stop at a feasible solution
+ACCEPTED_STATUSES = (LpSolutionOptimal, LpSolutionIntegerFeasible)
+
+
+def optional(value, convert):
+    return None if value in (None, "") else convert(value)
+
+
+class SolverProfile:
+    """Solver backend and its limits, read from the environment and optionally overridden per message"""
+
+    BACKENDS = ("cbc", "highs")
+
+    def __init__(self, backend="cbc", threads=None, time_limit=None, gap=None, warm_start=True, msg=True,
+                 decompose=False):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown solver backend '{backend}'")
+        self.backend = backend
+        self.threads = threads
+        self.time_limit = time_limit
+        self.gap = gap
+        self.warm_start = warm_start
+        self.msg = msg
+        self.decompose = decompose
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            backend=getenv("PLANNER_BACKEND", "cbc"),
+            threads=optional(getenv("PLANNER_THREADS"), int),
+            time_limit=optional(getenv("PLANNER_TIME_LIMIT"), float),
+            gap=optional(getenv("PLANNER_GAP"), float),
+            warm_start=getenv("PLANNER_WARM_START", "1") != "0",
+            msg=getenv("PLANNER_SOLVER_LOG", "1") != "0",
+            decompose=getenv("PLANNER_DECOMPOSE", "0") != "0",
+        )
+
+    def override(self, settings):
+        """Profile with the values of a message's `solver` field
+
+        ({backend, threads, timeLimit, gap, warmStart, decompose}), unset keys keep the current values.
+        """
+        if not settings:
+            return self
+        return SolverProfile(
+            backend=settings.get("backend", self.backend),
+            threads=optional(settings.get("threads", self.threads), int),
+            time_limit=optional(settings.get("timeLimit", self.time_limit), float),
+            gap=optional(settings.get("gap", self.gap), float),
+            warm_start=bool(settings.get("warmStart", self.warm_start)),
+            msg=self.msg,
+            decompose=bool(settings.get("decompose", self.decompose)),
+        )
+
+    def __repr__(self):
+        return (f"SolverProfile(backend={self.backend}, threads={self.threads}, time_limit={self.time_limit}, "
+                f"gap={self.gap}, warm_start={self.warm_start}, decompose={self.decompose})")
+
+
+class SparseModel:
+    """Binary assignment model keyed by (job, worker) and stored as a row-wise sparse matrix"""
+
+    def __init__(self):
+        self.columns = {}
+        self.slacks = {}
+        self.keys = []
+        self.cost = []
+        self.col_lower = []
+        self.col_upper = []
+        self.integer = []
+        self.row_start = [0]
+        self.row_index = []
+        self.row_value = []
+        self.row_lower = []
+        self.row_upper = []
+        self.start = {}
+        self.info = {}
+
+    @property
+    def num_columns(self):
+        return len(self.cost)
+
+    @property
+    def num_rows(self):
+        return len(self.row_lower)
+
+    def _add_column(self, key, cost, lower, upper, integer):
+        index = len(self.cost)
+        self.keys.append(key)
+        self.cost.append(cost)
+        self.col_lower.append(lower)
+        self.col_upper.append(upper)
+        self.integer.append(integer)
+        return index
+
+    def add_variable(self, job, worker, cost=0):
+        """Add a binary variable assigning `worker` to `job` and return its column index"""
+        index = self._add_column((job, worker), cost, 0, 1, True)
+        self.columns[(job, worker)] = index
+        return index
+
+    def add_variables(self, keys, costs):
+        """Add a binary variable for every (job, worker) key at once and return their column indices as an array"""
+        first = len(self.cost)
+        self.keys.extend(keys)
+        self.cost.extend(costs)
+        self.col_lower.extend([0] * len(keys))
+        self.col_upper.extend([1] * len(keys))
+        self.integer.extend([True] * len(keys))
+        self.columns.update(zip(keys, range(first, first + len(keys))))
+        return np.arange(first, first + len(keys))
+
+    def add_slack(self, rule, target, cost):
+        """Add a non-negative slack column relaxing `rule` for `target` at `cost` per unit"""
+        index = self._add_column(None, cost, 0, INF, False)
+        self.slacks[index] = (rule, target)
+        return index
+
+    def set_start(self, *sources):
+        """Seed the solver with assignments ({job: [workers]}), earlier sources win for a worker in several.
+
+        Assignments without a variable in this model are skipped, the solver completes the partial start.
+        Returns the number of seeded variables.
+        """
+        seeded = set()
+        for assignments in sources:
+            for job, workers in assignments.items():
+                for worker in workers:
+                    index = self.columns.get((job, worker))
+                    if index is not None and worker not in seeded:
+                        self.start[index] = 1
+                        seeded.add(worker)
+        return len(seeded)
+
+    def add_row(self, indices, coefficients=None, lower=-INF, upper=INF):
+        """Add the constraint lower <= sum(coefficients * x[indices]) <= upper"""
+        self.row_index.extend(indices)
+        self.row_value.extend(coefficients if coefficients is not None else [1] * len(indices))
+        self.row_start.append(len(self.row_index))
+        self.row_lower.append(lower)
+        self.row_upper.append(upper)
+        return len(self.row_lower) - 1
+
+    def matrix(self):
+        """Return the constraint matrix in CSR form (start, index, value)"""
+        return (np.asarray(self.row_start, dtype=np.int32),
+                np.asarray(self.row_index, dtype=np.int32),
+                np.asarray(self.row_value, dtype=np.float64))
+
+    def solve(self, profile=None):
+        """Solve the model and return (status, solution vector) using PuLP solution status codes.
+
+        A solution is found when the status is in ACCEPTED_STATUSES. The status, objective, relative gap, model
+        size and solve time of the last solve are kept in `info`.
+        """
+        profile = profile or SolverProfile()
+        start = time.perf_counter()
+        if self.num_columns == 0:
+            status, solution = self._solve_empty()
+            self.info = {"backend": profile.backend, "status": status, "objective": 0.0, "gap": 0.0}
+        elif profile.backend == "highs":
+            status, solution = self._solve_highs(profile)
+        else:
+            status, solution = self._solve_cbc(profile)
+        self.info.update(variables=self.num_columns, constraints=self.num_rows, seconds=time.perf_counter() - start)
+        return status, solution
+
+    def assignments(self, solution):
+        """Translate a solution vector into {job: [workers]}"""
+        plan = {}
+        for index in np.flatnonzero(solution > 0.5):
+            if self.keys[index] is not None:
+                job, worker = self.keys[index]
+                plan.setdefault(job, []).append(worker)
+        return plan
+
+    def relaxations(self, solution):
+        """List the slack columns used by a solution as {rule, target, amount} records"""
+        return [
+            {"rule": rule, "target": target, "amount": float(solution[index])}
+            for index, (rule, target) in self.slacks.items() if solution[index] > 1e-6
+        ]
+
+    def _solve_empty(self):
+        start, _, _ = self.matrix()
+        empty = start[1:] == start[:-1]
+        lower = np.asarray(self.row_lower, dtype=np.float64)
+        upper = np.asarray(self.row_upper, dtype=np.float64)
+        feasible = not np.any(empty & ((lower > 0) | (upper < 0)))
+        return (LpSolutionOptimal if feasible else LpSolutionInfeasible), np.zeros(0)
+
+    def _solve_cbc(self, profile):
+        model = LpProblem(name="Plan", sense=LpMinimize)
+        variables = [
+            LpVariable(f"x{i}", lowBound=self.col_lower[i],
+                       upBound=None if self.col_upper[i] == INF else self.col_upper[i],
+                       cat="Integer" if self.integer[i] else "Continuous")
+            for i in range(self.num_columns)
+        ]
+        model += LpAffineExpression((variables[i], c) for i, c in enumerate(self.cost) if c)
+
+        start, index, value = self.matrix()
+        for row in range(self.num_rows):
+            expr = LpAffineExpression(
+                (variables[i], v) for i, v in zip(index[start[row]:start[row + 1]], value[start[row]:start[row + 1]])
+            )
+            lower, upper = self.row_lower[row], self.row_upper[row]
+            if lower == upper:
+                model += LpConstraint(expr, LpConstraintEQ, rhs=lower)
+                continue
+            if lower > -INF:
+                model += LpConstraint(expr, LpConstraintGE, rhs=lower)
+            if upper < INF:
+                model += LpConstraint(expr, LpConstraintLE, rhs=upper)
+
+        warm_start = profile.warm_start and bool(self.start)
+        if warm_start:
+            for index, value in self.start.items():
+                variables[index].setInitialValue(value)
+
+        model.solve(PULP_CBC_CMD(msg=profile.msg, threads=profile.threads, timeLimit=profile.time_limit,
+                                 gapRel=profile.gap, warmStart=warm_start))
+        status = model.sol_status
+        solution = np.fromiter((v.varValue or 0 for v in variables), dtype=np.float64, count=len(variables))
+        self.info = {"backend": "cbc", "status": status, "objective": float(solution @ np.asarray(self.cost)),
+                     "gap": None}
+        return status, solution
+
+    def _solve_highs(self, profile):
+        import highspy
+
+        lp = highspy.HighsLp()
+        lp.num_col_ = self.num_columns
+        lp.num_row_ = self.num_rows
+        lp.col_cost_ = np.asarray(self.cost, dtype=np.float64)
+        lp.col_lower_ = np.asarray(self.col_lower, dtype=np.float64)
+        lp.col_upper_ = np.asarray(self.col_upper, dtype=np.float64)
+        lp.row_lower_ = np.asarray(self.row_lower, dtype=np.float64)
+        lp.row_upper_ = np.asarray(self.row_upper, dtype=np.float64)
+        lp.integrality_ = [
+            highspy.HighsVarType.kInteger if integer else highspy.HighsVarType.kContinuous for integer in self.integer
+        ]
+        start, index, value = self.matrix()
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.start_ = start
+        lp.a_matrix_.index_ = index
+        lp.a_matrix_.value_ = value
+
+        highs = highspy.Highs()
+        highs.setOptionValue("output_flag", profile.msg)
+        if profile.threads is not None:
+            highs.setOptionValue("threads", profile.threads)
+        if profile.time_limit is not None:
+            highs.setOptionValue("time_limit", profile.time_limit)
+        if profile.gap is not None:
+            highs.setOptionValue("mip_rel_gap", profile.gap)
+        highs.passModel(lp)
+        if profile.warm_start and self.start:
+            highs.setSolution(len(self.start), np.fromiter(self.start.keys(), dtype=np.int32),
+                              np.fromiter(self.start.values(), dtype=np.float64))
+        highs.run()
+
+        model_status = highs.getModelStatus()
+        info = highs.getInfo()
+        if model_status == highspy.HighsModelStatus.kOptimal:
+            status = LpSolutionOptimal
+        elif model_status == highspy.HighsModelStatus.kInfeasible:
+            status = LpSolutionInfeasible
+        elif info.primal_solution_status == 2:
+            # Stopped by a limit with a feasible incumbent
+            status = LpSolutionIntegerFeasible
+        else:
+            status = LpSolutionNoSolutionFound
+        solution = np.asarray(highs.getSolution().col_value, dtype=np.float64)
+        self.info = {"backend": "highs", "status": status, "objective": info.objective_function_value,
+                     "gap": info.mip_gap}
+        return status, solution
@@ -0,0 +1,145 @@
+import time
+
+import numpy as np
+
+from src import metrics
+from src.config import getenv
+from src.forbids import forbid_cliques, forbid_pairs
+from src.model import ACCEPTED_STATUSES, SparseModel
+from src.viability import Viability
+
+PLANNER_ELASTIC = getenv("PLANNER_ELASTIC", "1") != "0"
+
+# Penalty per unit of slack of every relaxable rule. The tiers keep the order of the former retry ladder:
+# per job cars are given up first (the area driver minimums replace them), forbidden pairs and jobs last. Staffing
+# minimums are only relaxed in a re-plan, whose few released workers may not be able to fill every job.
+RELAXATION_WEIGHTS = {
+    "area_drivers": 100,
+    "neededCars": 1_000,
+    "restrict_pair": 10_000,
+    "forbidden_jobs": 10_000,
+    "strongWorkers": 100_000,
+    "minWorkers": 100_000,
+}
+
+
+def generate_plan(snapshot, first_round=True, elastic=PLANNER_ELASTIC, profile=None, start=(), area_cars=False):
+    """Plan one round of the snapshot, returns ({job: [workers]}, relaxations) or ({}, None) when no plan exists.
+
+    Like the former retry ladder, round one asks for the cars of every job and only when they cannot all be found
+    (`area_cars`) asks for the area driver minimums instead.
+    """
+    build_started = time.perf_counter()
+    jobs, job_properties, workers = snapshot.jobs, snapshot.job_properties, snapshot.workers
+    forbids, forbidden_jobs, areas, scores = snapshot.forbids, snapshot.forbidden_jobs, snapshot.areas, snapshot.scores
+
+    viability = Viability(jobs, job_properties, workers, forbidden_jobs)
+    viable = viability.matrix(relax_forbidden=elastic)
+
+    job_table, worker_table = viability.job_table, viability.worker_table
+    # A failed re-plan round would leave its released workers without a job, short jobs are reported instead
+    short_staffed = elastic and snapshot.released is not None
+    cost = viability.costs(scores, RELAXATION_WEIGHTS["forbidden_jobs"])
+
+    # One variable per viable (job, worker) pair in job order, job j owns columns[bounds[j]:bounds[j + 1]]
+    job_rows, worker_cols = np.nonzero(viable)
+    model = SparseModel()
+    columns = model.add_variables(
+        [(jobs[j], viability.workers[w]) for j, w in zip(job_rows.tolist(), worker_cols.tolist())],
+        cost[job_rows, worker_cols].tolist())
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(job_rows, minlength=len(jobs)))))
+    area_drivers = {area: ([], []) for area in areas}
+
+    for j, job in enumerate(jobs):
+        job_vars, job_workers = columns[bounds[j]:bounds[j + 1]], worker_cols[bounds[j]:bounds[j + 1]]
+        model.add_row(job_vars.tolist(), upper=int(job_table.max_workers[j]))
+        if first_round:
+            strong = job_vars[worker_table.is_strong[job_workers]].tolist()
+            if short_staffed:
+                strong.append(model.add_slack("strongWorkers", job, RELAXATION_WEIGHTS["strongWorkers"]))
+            model.add_row(strong, lower=int(job_table.strong_workers[j]))
+            driver, seats = [], []
+            if job_table.requires_car[j]:
+                is_driver = worker_table.is_driver[job_workers]
+                driver, seats = job_vars[is_driver].tolist(), worker_table.seats[job_workers[is_driver]].tolist()
+                area_driver, area_seats = area_drivers[job_table.area_ids[job_table.area[j]]]
+                area_driver.extend(driver)
+                area_seats.extend(seats)
+            if not area_cars:
+                if elastic:
+                    driver.append(model.add_slack("neededCars", job, RELAXATION_WEIGHTS["neededCars"]))
+                    seats.append(1)
+                model.add_row(driver, seats, lower=int(job_table.needed_cars[j]))
+        else:
+            staff = job_vars.tolist()
+            if short_staffed:
+                staff.append(model.add_slack("minWorkers", job, RELAXATION_WEIGHTS["minWorkers"]))
+            model.add_row(staff, lower=int(job_table.min_workers[j]))
+
+    by_worker = np.argsort(worker_cols, kind="stable")
+    worker_bounds = np.concatenate(([0], np.cumsum(np.bincount(worker_cols, minlength=len(worker_table)))))
+    for w in range(len(worker_table)):
+        model.add_row(columns[by_worker[worker_bounds[w]:worker_bounds[w + 1]]].tolist(), lower=1, upper=1)
+
+    for j, cliques in forbid_cliques(forbid_pairs(forbids, viability.worker_index), viable):
+        for clique in cliques:
+            restrict_clique(jobs[j], [viability.workers[w] for w in clique], model, elastic)
+
+    if first_round and area_cars:
+        for area in areas:
+            drivers, seats = area_drivers[area]
+            if elastic:
+                drivers.append(model.add_slack("area_drivers", area, RELAXATION_WEIGHTS["area_drivers"]))
+                seats.append(1)
+            model.add_row(drivers, seats, lower=areas[area]["requiredDrivers"])
+
+    print(f"Planning {len(jobs)} jobs with {len(workers)} workers - Elastic: {elastic}, First Round: {first_round}"
+          f"{', Area Cars' if area_cars else ''}")
+
+    if start:
+        print(f"Warm start: {model.set_start(*start)} workers seeded")
+
+    build_seconds = time.perf_counter() - build_started
+    status, solution = model.solve(profile)
+    metrics.record_solve(first_round, model.info, build_seconds)
+    if status not in ACCEPTED_STATUSES:
+        print(f"SOLVER FAILED - Status: {status}")
+        return {}, None
+    print(f"SOLVER SUCCESS - Status: {status}, objective: {model.info['objective']}, gap: {model.info['gap']}")
+
+    res_dict = model.assignments(solution)
+    relaxations = model.relaxations(solution)
+    needed_cars = [relaxation for relaxation in relaxations if relaxation["rule"] == "neededCars"]
+    if first_round and elastic and not area_cars and needed_cars:
+        print(f"Jobs {[r['target'] for r in needed_cars]} do not get their cars, "
+              "planning with the area driver minimums instead")
+        res_dict, relaxations = generate_plan(snapshot, first_round, elastic, profile, start, area_cars=True)
+        # The area driver minimums stand in for the cars, the jobs still do not get what they asked for
+        return res_dict, None if relaxations is None else needed_cars + relaxations
+    for job, assigned in res_dict.items():
+        j = viability.job_index[job]
+        for worker in assigned:
+            if viability.forbidden[j, viability.worker_index[worker]]:
+                relaxations.append({"rule": "forbidden_jobs", "target": (job, worker), "amount": 1.0})
+    report_relaxations(relaxations)
+    return res_dict, relaxations
+
+
+def report_relaxations(relaxations):
+    if not relaxations:
+        print("All rules satisfied, nothing was relaxed")
+        return
+    print(f"Relaxed {len(relaxations)} rules:")
+    for relaxation in relaxations:
+        print(f"  {relaxation['rule']} for {relaxation['target']} by {relaxation['amount']:g}")
+
+
+def restrict_clique(job, clique, model, elastic):
+    """At most one worker of a clique of workers forbidden from working together may work the job"""
+    clique_vars = [model.columns[(job, worker)] for worker in clique]
+
+    if elastic:
+        slack = model.add_slack("restrict_pair", (job, *clique), RELAXATION_WEIGHTS["restrict_pair"])
+        model.add_row(clique_vars + [slack], [1] * len(clique_vars) + [-1], upper=1)
+    else:
+        model.add_row(clique_vars, upper=1)
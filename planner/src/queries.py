@@ -15,20 +15,23 @@ select_workers = """SELECT DISTINCT "workerId" as "id",
     FROM "Plan" P JOIN "WorkerAvailability" WA on P."summerJobEventId" = WA."eventId" JOIN "Worker" W on WA."workerId" = W.id LEFT JOIN "Car" on W.id = "Car"."ownerId" AND "Car"."forEventId" = P."summerJobEventId"
     WHERE day = any("workDays") AND "workerId" NOT IN (SELECT AJTW."B" as Id
     FROM "ActiveJob" JOIN "_ActiveJobToWorker" AJTW on "ActiveJob".id = AJTW."A"
-    WHERE "ActiveJob"."planId" = %(planId)s) AND P.id = %(planId)s"""
-
-select_strong_workers = select_workers + """AND ("Car".id IS NOT NULL OR "isStrong")"""
+    WHERE "ActiveJob"."planId" = %(planId)s AND AJTW."B" <> ALL(%(released)s::text[])) AND P.id = %(planId)s"""
 
 select_jobs = """SELECT "proposedJobId" FROM "ActiveJob" WHERE "planId" = %(planId)s """
 
 select_job_details = """WITH CW AS (SELECT "proposedJobId", count(AJTW."B") as currentWorkers
-    FROM "ActiveJob" LEFT JOIN "_ActiveJobToWorker" AJTW on "ActiveJob".id = AJTW."A"
+    FROM "ActiveJob" LEFT JOIN "_ActiveJobToWorker" AJTW on "ActiveJob".id = AJTW."A" AND AJTW."B" <> ALL(%(released)s::text[])
     WHERE "ActiveJob"."planId" = %(planId)s
     GROUP BY "proposedJobId"),
     CWS AS (SELECT "proposedJobId", count(S."B") as currentStrongWorkers
-        FROM "ActiveJob" AJ LEFT JOIN (SELECT * FROM "_ActiveJobToWorker" AJTW  WHERE "B" IN (SELECT "id" FROM "Worker" WHERE "isStrong")) S
+        FROM "ActiveJob" AJ LEFT JOIN (SELECT * FROM "_ActiveJobToWorker" AJTW  WHERE "B" IN (SELECT "id" FROM "Worker" WHERE "isStrong") AND "B" <> ALL(%(released)s::text[])) S
             ON S."A"=AJ."id"
         WHERE AJ."planId" = %(planId)s
+        GROUP BY "proposedJobId"),
+    CS AS (SELECT "proposedJobId", sum(C.seats) as currentSeats
+        FROM "ActiveJob" AJ JOIN "_ActiveJobToWorker" AJTW on AJ.id = AJTW."A" JOIN "Plan" P on AJ."planId" = P.id
+            JOIN "Car" C on C."ownerId" = AJTW."B" AND C."forEventId" = P."summerJobEventId"
+        WHERE AJ."planId" = %(planId)s AND AJTW."B" <> ALL(%(released)s::text[])
         GROUP BY "proposedJobId")
 SELECT PJ.id,
        "maxWorkers" - cw.currentWorkers as "maxWorkers",
@@ -39,64 +42,109 @@ SELECT PJ.id,
        "requiresCar",
        "supportsAdoration",
        "areaId",
-       (("maxWorkers" - "minWorkers")/2 - 1) as "neededCars"
+       (("maxWorkers" - "minWorkers")/2 - 1) - COALESCE(cs.currentSeats, 0) as "neededCars"
 
     FROM "ProposedJob" PJ LEFT JOIN CW ON CW."proposedJobId" = PJ.id JOIN "Area" A ON PJ."areaId" = A.id LEFT JOIN CWS ON CWS."proposedJobId" = PJ.id
+        LEFT JOIN CS ON CS."proposedJobId" = PJ.id
     WHERE PJ.id in (SELECT "proposedJobId" FROM "ActiveJob" WHERE "planId" = %(planId)s)"""
 
-select_areas = """SELECT DISTINCT "areaId" as id, (sum("minWorkers") + sum("maxWorkers"))/2 as "requiredDrivers" FROM "ActiveJob" JOIN "ProposedJob" PJ on PJ.id = "ActiveJob"."proposedJobId"
+select_areas = """SELECT DISTINCT "areaId" as id, (sum("minWorkers") + sum("maxWorkers"))/2 - COALESCE((
+                             SELECT sum(C.seats) FROM "ActiveJob" AJ JOIN "ProposedJob" APJ on APJ.id = AJ."proposedJobId"
+                                 JOIN "_ActiveJobToWorker" AJTW on AJ.id = AJTW."A" JOIN "Plan" P on AJ."planId" = P.id
+                                 JOIN "Car" C on C."ownerId" = AJTW."B" AND C."forEventId" = P."summerJobEventId"
+                             WHERE AJ."planId" = %(planId)s AND APJ."areaId" = PJ."areaId" AND AJTW."B" <> ALL(%(released)s::text[])
+                         ), 0) as "requiredDrivers" FROM "ActiveJob" JOIN "ProposedJob" PJ on PJ.id = "ActiveJob"."proposedJobId"
                          WHERE "areaId" IN (SELECT id FROM "Area" WHERE "requiresCar") AND "planId" = %(planId)s
                          GROUP BY "areaId";"""
 
 select_active_jobs = """SELECT "proposedJobId" as id, "id" as "activeJobId"  FROM "ActiveJob" WHERE "planId" = %(planId)s"""
 
-insert_plan = """INSERT INTO "_ActiveJobToWorker" ("A", "B") VALUES (%(job)s, %(worker)s)"""
+insert_plan = """INSERT INTO "_ActiveJobToWorker" ("A", "B") VALUES %s"""
+
+# The co-worker history of a plan: the assignments of the earlier days of its event, like the cache of history.py.
+# Two workers sharing a job on more than half of the earlier days with assignments are a frequent pair, a worker is
+# one with themselves as well, so the jobs of their own earlier days are forbidden too.
+earlier_assignments = """WITH earlier AS (SELECT E.id as "planId", AJ.id as "activeJobId", AJ."proposedJobId", AJTW."B" as worker
+        FROM "Plan" P JOIN "Plan" E ON E."summerJobEventId" = P."summerJobEventId" AND E.day < P.day
+            JOIN "ActiveJob" AJ ON AJ."planId" = E.id JOIN "_ActiveJobToWorker" AJTW ON AJTW."A" = AJ.id
+        WHERE P.id = %(planId)s),
+    frequent AS (SELECT S.worker as id, F.worker as forbid FROM earlier S JOIN earlier F ON F."activeJobId" = S."activeJobId"
+        GROUP BY S.worker, F.worker
+        HAVING count(*) >= (SELECT count(DISTINCT "planId")/2+1 FROM earlier))"""
 
-select_forbids = """WITH forbid as (SELECT id, forbid FROM (SELECT  S."B" as id, F."B" as forbid, count(*) as count FROM "_ActiveJobToWorker" F JOIN "_ActiveJobToWorker" S ON F."A" = S."A"
-                                        GROUP BY S."B", F."B")  forbid
-                WHERE count >= (SELECT count(DISTINCT "planId")/2+1
-                                FROM "ActiveJob" JOIN "Plan" ON "planId" = "Plan".id
-                                WHERE day < (SELECT day FROM "Plan" WHERE "Plan".id = %(planId)s)))
+select_forbids = earlier_assignments + """
 SELECT id, forbid
- FROM forbid
+ FROM frequent
    WHERE id > forbid"""
 
-select_forbidden_jobs = """SELECT forbid.id, array_agg(AJ."proposedJobId") FROM (SELECT  S."B" as id, F."B" as forbid, count(*) as count FROM "_ActiveJobToWorker" F JOIN "_ActiveJobToWorker" S ON F."A" = S."A"
-                                        GROUP BY S."B", F."B")  forbid JOIN "_ActiveJobToWorker" ON forbid = "_ActiveJobToWorker"."B" JOIN "ActiveJob" AJ on AJ.id = "_ActiveJobToWorker"."A"
-                WHERE count >= (SELECT count(DISTINCT "planId")/2+1
-                                FROM "ActiveJob" JOIN "Plan" ON "planId" = "Plan".id
-                                WHERE day < (SELECT day FROM "Plan" WHERE "Plan".id = %(planId)s))
-GROUP BY forbid.id;"""
+select_forbidden_jobs = earlier_assignments + """
+SELECT frequent.id, array_agg(DISTINCT earlier."proposedJobId" COLLATE "C" ORDER BY earlier."proposedJobId" COLLATE "C")
+    FROM frequent JOIN earlier ON earlier.worker = frequent.forbid
+GROUP BY frequent.id;"""
 
 select_score = """WITH stats as
-    (SELECT AJ."B" as worker, "jobType", count(*) as score
-     FROM "_ActiveJobToWorker" AJ JOIN "ActiveJob" A on A.id = AJ."A" JOIN "ProposedJob" PJ on PJ.id = A."proposedJobId" JOIN "Plan" ON "planId" = "Plan".id
-                                WHERE day < (SELECT day FROM "Plan" WHERE "Plan".id = %(planId)s)
-     GROUP BY  AJ."B", "jobType")
-SELECT worker, PJ.id as job, score FROM stats JOIN "ProposedJob" PJ ON stats."jobType" = PJ."jobType"; """
-
-select_drive_jobs = """
-WITH seats as (SELECT AJ.id, sum("seats") as seats
-    FROM "ActiveJob" AJ JOIN "_ActiveJobToWorker" AJTW on AJ.id = AJTW."A" JOIN "Worker" W on W.id = AJTW."B" JOIN "Car" C on W.id = C."ownerId" JOIN "Plan" P on AJ."planId" = P.id
-    WHERE "planId" =  %(planId)s AND C."forEventId" = P."summerJobEventId"
-    GROUP BY AJ.id),
-    people as (SELECT AJ.id, count(W.id) as need
-    FROM "ActiveJob" AJ JOIN "_ActiveJobToWorker" AJTW on AJ.id = AJTW."A" JOIN "Worker" W on W.id = AJTW."B"
-    WHERE "planId" =  %(planId)s
-    GROUP BY AJ.id)
-SELECT seats.id,seats >= need as ok
-FROM seats JOIN people ON people.id = seats.id JOIN "ActiveJob" AJ ON AJ.id = seats.id JOIN "ProposedJob" PJ on PJ.id = AJ."proposedJobId"
-    WHERE "areaId" IN (SELECT id FROM "Area" WHERE "requiresCar") ORDER BY  ok desc;
-"""
-
-select_driver = """SELECT W.id as id, C.id as "carId", "seats"
-    FROM "ActiveJob" AJ JOIN "_ActiveJobToWorker" AJTW on AJ.id = AJTW."A" JOIN "Worker" W on W.id = AJTW."B" JOIN "Car" C on W.id = C."ownerId" JOIN "Plan" P on AJ."planId" = P.id
-    WHERE AJ."id" = %(planId)s AND C."forEventId" = P."summerJobEventId"
-    """
-
-select_people = """SELECT "B" as id FROM "_ActiveJobToWorker" AJTW JOIN "ActiveJob" AJ on AJTW."A" = AJ.id JOIN "Plan" P on AJ."planId" = P.id 
-                   WHERE AJTW."A" = %(planId)s AND AJTW."B" not in (SELECT "ownerId" FROM "Car" WHERE "forEventId" = P."summerJobEventId") """
-
-insert_ride = """INSERT INTO "Ride" ("id", "driverId", "carId", "jobId") VALUES (%(uuid)s, %(driver)s, %(car)s, %(job)s)"""
-
-insert_rider = """INSERT INTO "_RideToWorker" ("A", "B") VALUES (%(ride)s, %(worker)s)"""
\ No newline at end of file
+    (SELECT AJTW."B" as worker, PJ."jobType", count(*) as score
+     FROM "Plan" P JOIN "Plan" E ON E."summerJobEventId" = P."summerJobEventId" AND E.day < P.day
+        JOIN "ActiveJob" AJ ON AJ."planId" = E.id JOIN "_ActiveJobToWorker" AJTW on AJTW."A" = AJ.id
+        JOIN "ProposedJob" PJ on PJ.id = AJ."proposedJobId"
+     WHERE P.id = %(planId)s
+     GROUP BY AJTW."B", PJ."jobType")
+SELECT worker, PJ.id as job, score FROM stats JOIN "ProposedJob" PJ ON stats."jobType" = PJ."jobType"
+    WHERE PJ.id IN (SELECT "proposedJobId" FROM "ActiveJob" WHERE "planId" = %(planId)s); """
+
+select_ride_workers = """SELECT AJ.id as job, AJTW."B" as worker, C.id as "carId", C.seats
+    FROM "ActiveJob" AJ JOIN "_ActiveJobToWorker" AJTW on AJ.id = AJTW."A" JOIN "Plan" P on AJ."planId" = P.id
+        JOIN "ProposedJob" PJ on PJ.id = AJ."proposedJobId"
+        LEFT JOIN "Car" C on C."ownerId" = AJTW."B" AND C."forEventId" = P."summerJobEventId"
+    WHERE AJ."planId" = %(planId)s AND PJ."areaId" IN (SELECT id FROM "Area" WHERE "requiresCar")
+        AND NOT EXISTS (SELECT 1 FROM "Ride" R LEFT JOIN "_RideToWorker" RW ON RW."A" = R.id
+                        WHERE R."jobId" = AJ.id AND (R."driverId" = AJTW."B" OR RW."B" = AJTW."B"))
+    ORDER BY AJ.id, AJTW."B" """
+
+select_open_rides = """SELECT R.id, R."jobId" as job, C.seats - 1 - count(RW."B") as free
+    FROM "Ride" R JOIN "ActiveJob" AJ on AJ.id = R."jobId" JOIN "Car" C on C.id = R."carId"
+        LEFT JOIN "_RideToWorker" RW ON RW."A" = R.id
+    WHERE AJ."planId" = %(planId)s
+    GROUP BY R.id, R."jobId", C.seats
+    HAVING C.seats - 1 - count(RW."B") > 0
+    ORDER BY R."jobId", R.id"""
+
+insert_ride = """INSERT INTO "Ride" ("id", "driverId", "carId", "jobId") VALUES %s"""
+
+insert_rider = """INSERT INTO "_RideToWorker" ("A", "B") VALUES %s"""
+
+insert_log = """INSERT INTO "Logging" ("id", "authorId", "authorName", "resourceId", "eventType", "message") VALUES %s"""
+
+select_plan_event = """SELECT "summerJobEventId" as "eventId", day FROM "Plan" WHERE id = %(planId)s"""
+
+select_event_plans = """SELECT P.id, P.day,
+        md5(string_agg(AJTW."A" || ':' || AJTW."B", ',' ORDER BY AJTW."A" COLLATE "C", AJTW."B" COLLATE "C")) as checksum
+    FROM "Plan" P LEFT JOIN "ActiveJob" AJ on AJ."planId" = P.id LEFT JOIN "_ActiveJobToWorker" AJTW on AJ.id = AJTW."A"
+    WHERE P."summerJobEventId" = %(eventId)s
+    GROUP BY P.id, P.day"""
+
+select_plan_assignments = """SELECT AJ.id as "activeJobId", AJ."proposedJobId" as job, PJ."jobType", AJTW."B" as worker
+    FROM "ActiveJob" AJ JOIN "_ActiveJobToWorker" AJTW on AJ.id = AJTW."A" JOIN "ProposedJob" PJ on PJ.id = AJ."proposedJobId"
+    WHERE AJ."planId" = %(planId)s"""
+
+
+select_previous_assignments = """SELECT AJ."proposedJobId" as job, AJTW."B" as worker
+    FROM "ActiveJob" AJ JOIN "_ActiveJobToWorker" AJTW on AJ.id = AJTW."A"
+    WHERE AJ."planId" = (SELECT PP.id FROM "Plan" PP JOIN "Plan" P ON PP."summerJobEventId" = P."summerJobEventId"
+                         WHERE P.id = %(planId)s AND PP.day < P.day
+                         ORDER BY PP.day DESC LIMIT 1)"""
+
+select_plan_days = """SELECT id, day, "summerJobEventId" as "eventId" FROM "Plan" WHERE id = ANY(%(planIds)s::text[]) ORDER BY day"""
+
+select_event_plan_days = """SELECT id, day, "summerJobEventId" as "eventId" FROM "Plan" WHERE "summerJobEventId" = %(eventId)s ORDER BY day"""
+
+select_released_workers = """SELECT DISTINCT AJ.id as "activeJobId", AJTW."B" as worker
+    FROM "ActiveJob" AJ JOIN "_ActiveJobToWorker" AJTW on AJ.id = AJTW."A"
+    WHERE AJ."planId" = %(planId)s AND (AJ."proposedJobId" = ANY(%(jobs)s::text[]) OR AJTW."B" = ANY(%(workers)s::text[]))"""
+
+delete_job_riders = """DELETE FROM "_RideToWorker" RW USING "Ride" R WHERE RW."A" = R.id AND R."jobId" = ANY(%(activeJobs)s::text[])"""
+
+delete_job_rides = """DELETE FROM "Ride" WHERE "jobId" = ANY(%(activeJobs)s::text[])"""
+
+delete_assignments = """DELETE FROM "_ActiveJobToWorker" AJTW USING "ActiveJob" AJ
+    WHERE AJTW."A" = AJ.id AND AJ."planId" = %(planId)s AND AJTW."B" = ANY(%(workers)s::text[])"""
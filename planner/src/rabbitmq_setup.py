@@ -1,17 +1,11 @@
 import pika
-import os
 from urllib.parse import urlparse
-from dotenv import load_dotenv
-from pathlib import Path
-
-# Load environment variables from .env file in the project root
-env_path = Path(__file__).parent.parent.parent / '.env'
-load_dotenv(dotenv_path=env_path)
+from src.config import getenv
 
 def get_rabbitmq_config():
     """Get RabbitMQ configuration from environment variables"""
-    amqp_url = os.getenv('AMQP_URL', 'amqp://localhost')
-    queue_name = os.getenv('QUEUE_NAME', 'planner')
+    amqp_url = getenv('AMQP_URL', 'amqp://localhost')
+    queue_name = getenv('QUEUE_NAME', 'planner')
     return amqp_url, queue_name
 
 def setup_connection():
@@ -0,0 +1,77 @@
+from src.database import PreparedCursor
+from src.queries import select_open_rides, select_ride_workers
+
+
+def plan_rides(rows, open_rides=()):
+    """Assign passengers to cars for every job of the plan at once.
+
+    `rows` holds one record per worker of a job in an area that requires a car, with the worker's car if they
+    own one. `open_rides` are the stored rides of the plan with free seats ({id, job, free}), which take passengers
+    before any new ride is created. Then passengers are seated into the largest cars first, which uses the fewest
+    cars possible because every passenger takes exactly one seat. Returns the new rides as (driver, car, job,
+    passengers) tuples, the passengers joining open rides as (ride, passenger) pairs and the passengers left
+    without a seat.
+    """
+    drivers, passengers = {}, {}
+    for row in rows:
+        if row["carId"] is None:
+            passengers.setdefault(row["job"], []).append(row["worker"])
+            continue
+        job_drivers = drivers.setdefault(row["job"], {})
+        current = job_drivers.get(row["worker"])
+        if current is None or row["seats"] > current["seats"]:
+            job_drivers[row["worker"]] = row
+    rides_of_job = {}
+    for ride in open_rides:
+        rides_of_job.setdefault(ride["job"], []).append(ride)
+
+    rides, joined, unseated = [], [], []
+    # Every job with passengers, also one without any driver whose passengers all stay unseated
+    for job, people in passengers.items():
+        pointer = 0
+        for ride in sorted(rides_of_job.get(job, ()), key=lambda r: r["free"], reverse=True):
+            seated = people[pointer:pointer + ride["free"]]
+            pointer += len(seated)
+            joined.extend((ride["id"], passenger) for passenger in seated)
+        for driver in sorted(drivers.get(job, {}).values(), key=lambda d: d["seats"], reverse=True):
+            if pointer >= len(people):
+                break
+            # One seat is taken by the driver
+            seated = people[pointer:pointer + driver["seats"] - 1]
+            pointer += len(seated)
+            rides.append((driver["worker"], driver["carId"], job, seated))
+        unseated.extend(people[pointer:])
+    return rides, joined, unseated
+
+
+def snapshot_ride_rows(snapshot, assignments):
+    """Rows for `plan_rides` built from a snapshot and its assignments instead of the database.
+
+    The snapshot does not hold car ids, every driver's car is identified by the driver.
+    """
+    rows = []
+    for job, workers in assignments.items():
+        if not snapshot.job_properties[job]["requiresCar"]:
+            continue
+        active_job = snapshot.active_jobs[job]["activeJobId"]
+        for worker in workers:
+            is_driver = snapshot.workers[worker]["isDriver"]
+            rows.append({"job": active_job, "worker": worker, "carId": worker if is_driver else None,
+                         "seats": snapshot.workers[worker]["seats"]})
+    return rows
+
+
+def generate_rides(plan_id, connection, writer):
+    """Load every driver and passenger of the plan in one query and write the resulting rides.
+
+    Workers already driving or riding to their job are left out, so generating the rides again adds no duplicates,
+    and new passengers first take the free seats of the stored rides of their job.
+    """
+    dict_cursor = connection.cursor(cursor_factory=PreparedCursor)
+    dict_cursor.execute(select_ride_workers, {"planId": plan_id})
+    rows = dict_cursor.fetchall()
+    dict_cursor.execute(select_open_rides, {"planId": plan_id})
+    rides, joined, unseated = plan_rides(rows, dict_cursor.fetchall())
+    if unseated:
+        print(f"Not enough seats for {len(unseated)} workers: {unseated}")
+    writer.write_rides(rides, joined)
@@ -0,0 +1,289 @@
+import gzip
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal
+
+import psycopg2.extensions
+
+from src.config import getenv
+from src.database import PLANNER_DB_POOL_MAX, PreparedCursor, connection as pooled_connection
+from src.queries import (
+    select_jobs, select_job_details, select_workers, select_forbids, select_forbidden_jobs, select_active_jobs,
+    select_areas, select_score, select_previous_assignments, select_released_workers
+)
+
+
+# Threads loading the independent inputs of a plan at the same time, each on a connection of its own from the pool
+# next to the one of the plan. 0 runs every query on the plan's connection.
+PLANNER_LOAD_WORKERS = min(int(getenv("PLANNER_LOAD_WORKERS", "3")), PLANNER_DB_POOL_MAX - 1)
+
+
+@contextmanager
+def read_transaction(connection, snapshot=None):
+    """Run the block in a single read-only REPEATABLE READ transaction so all queries see the same data.
+
+    With `snapshot` (an id from `pg_export_snapshot`) the transaction sees the data of the exporting transaction.
+    """
+    connection.set_session(isolation_level=psycopg2.extensions.ISOLATION_LEVEL_REPEATABLE_READ, readonly=True)
+    try:
+        if snapshot is not None:
+            connection.cursor().execute("SET TRANSACTION SNAPSHOT %s", (snapshot,))
+        yield connection.cursor(cursor_factory=PreparedCursor)
+    finally:
+        connection.rollback()
+        connection.set_session(isolation_level="DEFAULT", readonly="DEFAULT")
+
+
+# Version of the exported snapshot file format
+SNAPSHOT_FORMAT = 1
+
+
+def json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Cannot export {type(value).__name__} value {value!r}")
+
+
+def dictionarify(query_results):
+    return {row["id"]: {**row} for row in query_results}
+
+
+def transform_score(query_results):
+    return {(row["job"], row["worker"]): row["score"] for row in query_results}
+
+
+def load(dict_cursor, plan_id, query, released=()):
+    dict_cursor.execute(query, {"planId": plan_id, "released": list(released)})
+    return dictionarify(dict_cursor.fetchall())
+
+
+def load_released(dict_cursor, plan_id, replan):
+    """{worker: active job} of the assignments a re-plan of the changed jobs and workers in `replan` takes back"""
+    dict_cursor.execute(select_released_workers, {
+        "planId": plan_id, "jobs": list(replan.get("jobs") or ()), "workers": list(replan.get("workers") or ())
+    })
+    return {row["worker"]: row["activeJobId"] for row in dict_cursor.fetchall()}
+
+
+def load_jobs(dict_cursor, plan_id):
+    dict_cursor.execute(select_jobs, {"planId": plan_id})
+    return [row["proposedJobId"] for row in dict_cursor.fetchall()]
+
+
+def load_forbids(dict_cursor, plan_id):
+    dict_cursor.execute(select_forbids, {"planId": plan_id})
+    return [(row["id"], row["forbid"]) for row in dict_cursor.fetchall()]
+
+
+def load_forbidden_jobs(dict_cursor, plan_id):
+    return {id: row["array_agg"] for id, row in load(dict_cursor, plan_id, select_forbidden_jobs).items()}
+
+
+def load_scores(dict_cursor, plan_id):
+    dict_cursor.execute(select_score, {"planId": plan_id})
+    return transform_score(dict_cursor.fetchall())
+
+
+def load_previous_assignments(dict_cursor, plan_id):
+    dict_cursor.execute(select_previous_assignments, {"planId": plan_id})
+    previous_assignments = {}
+    for row in dict_cursor.fetchall():
+        previous_assignments.setdefault(row["job"], []).append(row["worker"])
+    return previous_assignments
+
+
+class SnapshotReader:
+    """Runs queries in worker threads on pooled connections that share the snapshot of the current read transaction.
+
+    All queries see the same data as the transaction of `dict_cursor`, which has to stay open until the reader is
+    closed. Without workers every query runs on `dict_cursor` when submitted.
+    """
+
+    def __init__(self, dict_cursor, workers=PLANNER_LOAD_WORKERS):
+        self.dict_cursor = dict_cursor
+        self.executor = None
+        if workers > 0:
+            dict_cursor.execute("SELECT pg_export_snapshot() AS id")
+            self.snapshot = dict_cursor.fetchone()["id"]
+            self.executor = ThreadPoolExecutor(workers, thread_name_prefix="snapshot-reader")
+
+    def submit(self, function, *args):
+        """Run `function(dict_cursor, *args)`, returns a future of its result"""
+        if self.executor is not None:
+            return self.executor.submit(self._run, function, *args)
+        future = Future()
+        future.set_result(function(self.dict_cursor, *args))
+        return future
+
+    def _run(self, function, *args):
+        with pooled_connection() as conn, read_transaction(conn, self.snapshot) as dict_cursor:
+            return function(dict_cursor, *args)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PlanSnapshot:
+    """All solver inputs of a plan, loaded once and shared by both planning rounds"""
+
+    def __init__(self, plan_id, jobs, job_properties, workers, forbids, forbidden_jobs, active_jobs, areas, scores,
+                 history=None, previous_assignments=None, released=None):
+        self.plan_id = plan_id
+        self.jobs = jobs
+        self.job_properties = job_properties
+        self.workers = workers
+        self.forbids = forbids
+        self.forbidden_jobs = forbidden_jobs
+        self.active_jobs = active_jobs
+        self.areas = areas
+        self.scores = scores
+        self.history = history
+        # Assignments of the previous day of the event, used to warm start the solver
+        self.previous_assignments = previous_assignments or {}
+        # Assignments ({worker: active job}) taken back for a re-plan, None when the plan is planned as a whole
+        self.released = released
+
+    @classmethod
+    def load(cls, connection, plan_id, history_store=None, history=None, replan=None):
+        """Load every input of the plan in one read transaction.
+
+        The independent queries run at the same time on pooled connections sharing the transaction's snapshot, the
+        co-worker history is loaded on the plan's connection meanwhile. It is taken from `history` (an EventHistory of
+        the plan) or `history_store` if given and aggregated in the database otherwise. With `replan` ({"jobs": [...],
+        "workers": [...]}) the assignments of the changed jobs and workers are loaded as if they were not stored.
+        """
+        with read_transaction(connection) as dict_cursor, SnapshotReader(dict_cursor) as reader:
+            released = load_released(dict_cursor, plan_id, replan) if replan is not None else None
+            jobs = reader.submit(load_jobs, plan_id)
+            job_properties = reader.submit(load, plan_id, select_job_details, released or ())
+            workers = reader.submit(load, plan_id, select_workers, released or ())
+            active_jobs = reader.submit(load, plan_id, select_active_jobs)
+            areas = reader.submit(load, plan_id, select_areas, released or ())
+
+            if history is None and history_store is None:
+                forbids = reader.submit(load_forbids, plan_id)
+                forbidden_jobs = reader.submit(load_forbidden_jobs, plan_id)
+                scores = reader.submit(load_scores, plan_id)
+                previous_assignments = reader.submit(load_previous_assignments, plan_id)
+            elif history is None:
+                history = history_store.load(dict_cursor, plan_id)
+
+            jobs, job_properties, workers, active_jobs, areas = (
+                future.result() for future in (jobs, job_properties, workers, active_jobs, areas))
+            if history is not None:
+                forbids = history.forbids()
+                forbidden_jobs = history.forbidden_jobs()
+                scores = history.scores(job_properties)
+                previous_assignments = history.previous_plan()
+            else:
+                forbids, forbidden_jobs, scores, previous_assignments = (
+                    future.result() for future in (forbids, forbidden_jobs, scores, previous_assignments))
+
+        return cls(plan_id, jobs, job_properties, workers, forbids, forbidden_jobs, active_jobs, areas, scores, history,
+                   previous_assignments, released)
+
+    def to_dict(self):
+        """Every solver input of the plan as JSON compatible data, the co-worker history only as its derived inputs"""
+        return {
+            "format": SNAPSHOT_FORMAT,
+            "planId": self.plan_id,
+            "jobs": self.jobs,
+            "jobProperties": self.job_properties,
+            "workers": self.workers,
+            "forbids": [list(pair) for pair in self.forbids],
+            "forbiddenJobs": self.forbidden_jobs,
+            "activeJobs": self.active_jobs,
+            "areas": self.areas,
+            "scores": [[job, worker, score] for (job, worker), score in self.scores.items()],
+            "previousAssignments": self.previous_assignments,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format {data.get('format')}")
+        return cls(
+            data["planId"], data["jobs"], data["jobProperties"], data["workers"],
+            [tuple(pair) for pair in data["forbids"]], data["forbiddenJobs"], data["activeJobs"], data["areas"],
+            {(job, worker): score for job, worker, score in data["scores"]},
+            previous_assignments=data["previousAssignments"],
+        )
+
+    def export(self, path):
+        """Write the snapshot to a gzip compressed JSON file"""
+        with gzip.open(path, "wt", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, default=json_value)
+
+    @classmethod
+    def read(cls, path):
+        """Read a snapshot written by `export`"""
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            return cls.from_dict(json.load(file))
+
+    def _replace(self, **changes):
+        fields = {**vars(self), **changes}
+        return PlanSnapshot(**fields)
+
+    def strong_workers(self):
+        """Snapshot restricted to the workers planned in the first round (strong workers and drivers)"""
+        workers = {id: worker for id, worker in self.workers.items() if worker["isStrong"] or worker["isDriver"]}
+        return self._replace(workers=workers)
+
+    def after(self, assignments):
+        """Snapshot of the plan once `assignments` ({job: [workers]}) are stored, computed without the database.
+
+        Like `select_job_details` and `select_areas` the seats of the assigned drivers count towards the cars of
+        their job and the drivers of its area.
+        """
+        assigned = {worker for job_workers in assignments.values() for worker in job_workers}
+        workers = {id: worker for id, worker in self.workers.items() if id not in assigned}
+
+        job_properties = dict(self.job_properties)
+        areas = dict(self.areas)
+        for job, job_workers in assignments.items():
+            if not job_workers:
+                continue
+            strong = sum(1 for worker in job_workers if self.workers[worker]["isStrong"])
+            seats = sum(self.workers[worker]["seats"] or 0 for worker in job_workers)
+            properties = dict(job_properties[job])
+            properties["maxWorkers"] -= len(job_workers)
+            properties["minWorkers"] -= len(job_workers)
+            properties["strongWorkers"] = max(0, properties["strongWorkers"] - strong)
+            properties["neededCars"] -= seats
+            job_properties[job] = properties
+            area = properties["areaId"]
+            if seats and area in areas:
+                areas[area] = {**areas[area], "requiredDrivers": areas[area]["requiredDrivers"] - seats}
+
+        return self._replace(workers=workers, job_properties=job_properties, areas=areas)
+
+    def neighbourhood(self):
+        """Snapshot of only the jobs that can still take workers, the assignments of the full jobs stay as they are"""
+        jobs = [job for job in self.jobs if self.job_properties[job]["maxWorkers"] > 0]
+        return self.restrict(jobs, self.workers)._replace(
+            history=self.history, previous_assignments=self.previous_assignments)
+
+    def restrict(self, jobs, workers):
+        """Snapshot of only the given jobs and workers (e.g. one area of a decomposed plan), without the history"""
+        job_set, worker_set = set(jobs), set(workers)
+        area_ids = {self.job_properties[job]["areaId"] for job in jobs}
+        return self._replace(
+            jobs=[job for job in self.jobs if job in job_set],
+            job_properties={job: self.job_properties[job] for job in job_set},
+            workers={id: self.workers[id] for id in workers},
+            forbids=[pair for pair in self.forbids if pair[0] in worker_set and pair[1] in worker_set],
+            forbidden_jobs={id: jobs for id, jobs in self.forbidden_jobs.items() if id in worker_set},
+            active_jobs={job: self.active_jobs[job] for job in job_set if job in self.active_jobs},
+            areas={area: self.areas[area] for area in area_ids if area in self.areas},
+            scores={key: score for key, score in self.scores.items() if key[0] in job_set and key[1] in worker_set},
+            history=None,
+            previous_assignments={},
+        )
@@ -0,0 +1,86 @@
+import numpy as np
+
+from src.columns import JobTable, WorkerTable
+
+
+def parse_pg_array(value):
+    """Parse a PostgreSQL array literal such as "{DUST,MITES}" (or an already decoded list) into a list"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        if value.startswith('{') and value.endswith('}'):
+            return [item.strip('"') for item in value[1:-1].split(',')] if len(value) > 2 else []
+        return [value]
+    return list(value)
+
+
+def encode(rows, column, vocabulary):
+    """Encode a PostgreSQL array column of every row as a boolean (rows x vocabulary) matrix"""
+    parsed = [parse_pg_array(row[column]) for row in rows]
+    for values in parsed:
+        for value in values:
+            vocabulary.setdefault(value, len(vocabulary))
+    encoded = np.zeros((len(parsed), max(len(vocabulary), 1)), dtype=bool)
+    for i, values in enumerate(parsed):
+        encoded[i, [vocabulary[value] for value in values]] = True
+    return encoded
+
+
+class Viability:
+    """Precomputed (job x worker) viability matrix together with the per-rule breakdown"""
+
+    def __init__(self, jobs, job_properties, workers, forbidden_jobs):
+        self.job_table = JobTable(jobs, job_properties)
+        self.worker_table = WorkerTable(workers)
+        self.jobs = self.job_table.ids
+        self.workers = self.worker_table.ids
+        self.job_index = self.job_table.index
+        self.worker_index = self.worker_table.index
+
+        job_rows = [job_properties[job] for job in self.jobs]
+        worker_rows = [workers[worker] for worker in self.workers]
+
+        self.vocabulary = {}
+        self.job_allergens = encode(job_rows, "allergens", self.vocabulary)
+        self.worker_allergies = encode(worker_rows, "workAllergies", self.vocabulary)
+        # Both sides may have grown the vocabulary, pad the first one to the final width
+        width = max(len(self.vocabulary), 1)
+        self.job_allergens = np.pad(self.job_allergens, ((0, 0), (0, width - self.job_allergens.shape[1])))
+
+        self.allergy_ok = (self.job_allergens.astype(np.int32) @ self.worker_allergies.T.astype(np.int32)) == 0
+        self.adoration_ok = self.job_table.supports_adoration[:, None] | ~self.worker_table.is_adoring[None, :]
+        self.forbidden = np.zeros((len(self.jobs), len(self.workers)), dtype=bool)
+        for worker, jobs in forbidden_jobs.items():
+            w = self.worker_index.get(worker)
+            if w is None:
+                continue
+            for job in parse_pg_array(jobs):
+                j = self.job_index.get(job)
+                if j is not None:
+                    self.forbidden[j, w] = True
+
+    def matrix(self, relax_forbidden=False):
+        """Return the boolean viability matrix, optionally ignoring the forbidden jobs"""
+        viable = self.allergy_ok & self.adoration_ok
+        return viable if relax_forbidden else viable & ~self.forbidden
+
+    def costs(self, scores, forbidden_penalty=0):
+        """Dense (job x worker) cost matrix of the scores ({(job, worker): score}) plus the forbidden job penalty"""
+        cost = self.forbidden * float(forbidden_penalty)
+        for (job, worker), score in scores.items():
+            j, w = self.job_index.get(job), self.worker_index.get(worker)
+            if j is not None and w is not None:
+                cost[j, w] += score
+        return cost
+
+    def blocked_counts(self, relax_forbidden=False):
+        """Per job counts of workers blocked by allergies, adoration and forbidden jobs (first failing rule wins)"""
+        allergy_blocked = ~self.allergy_ok
+        adoration_blocked = self.allergy_ok & ~self.adoration_ok
+        forbidden_blocked = np.zeros_like(self.forbidden) if relax_forbidden else (
+            self.allergy_ok & self.adoration_ok & self.forbidden)
+        return allergy_blocked.sum(axis=1), adoration_blocked.sum(axis=1), forbidden_blocked.sum(axis=1)
+
+    def allergens_of_job(self, job):
+        names = list(self.vocabulary)
+        return [names[i] for i in np.flatnonzero(self.job_allergens[self.job_index[job]])]
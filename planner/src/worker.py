@@ -0,0 +1,66 @@
+import importlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Entry points of the planner worker processes. The solver stack (NumPy, PuLP, HiGHS, psycopg2) is imported in the
+# workers only, the consumer process stays light and connects to RabbitMQ while the workers warm up.
+
+# Seconds a warm worker waits for the others to start
+WARM_UP_TIMEOUT = 60
+
+
+def warm_up(started=None):
+    """Process pool initializer importing the solver stack and opening a database connection before the first plan.
+
+    With a `started` barrier every worker waits until all of them are up, so no worker takes a second start-up task
+    while another one is still being started.
+    """
+    start = time.perf_counter()
+    importlib.import_module("src.solver")
+    from src.database import get_pool
+    try:
+        get_pool()
+    except Exception as e:
+        # The database may come up after the planner, the pool is created again on the first plan
+        print(f"Worker {os.getpid()} could not connect to the database yet: {e}")
+    print(f"Worker {os.getpid()} warmed up in {time.perf_counter() - start:.2f}s")
+    if started is not None:
+        try:
+            started.wait(timeout=WARM_UP_TIMEOUT)
+        except threading.BrokenBarrierError:
+            pass
+
+
+def ready():
+    """No-op task, done once a worker has run the initializer"""
+    return os.getpid()
+
+
+class TransientError(Exception):
+    """The plan failed for a reason outside of the message, e.g. a lost database connection, and can be tried again.
+
+    It stands in for the original error, so the consumer can tell it apart without importing psycopg2.
+    """
+
+
+@contextmanager
+def transient_errors():
+    import psycopg2
+    try:
+        yield
+    except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+        raise TransientError(repr(e)) from e
+
+
+def plan(plan_id, solver_settings=None, diagnostics=False, replan=None):
+    from src.solver import generate_plan_from_message
+    with transient_errors():
+        return generate_plan_from_message(plan_id, solver_settings, diagnostics, replan)
+
+
+def plan_batch(plan_ids=None, event_id=None, solver_settings=None, diagnostics=False, parallel=False):
+    from src.solver import generate_plans_from_message
+    with transient_errors():
+        return generate_plans_from_message(plan_ids, event_id, solver_settings, diagnostics, parallel)
@@ -0,0 +1,78 @@
+import json
+import time
+import uuid
+
+import psycopg2.extras
+
+from src.queries import (
+    delete_assignments, delete_job_riders, delete_job_rides, insert_log, insert_plan, insert_ride, insert_rider
+)
+
+
+class PlanWriter:
+    """Writes the assignments and rides of a plan with batched statements inside a single transaction"""
+
+    def __init__(self, connection, page_size=1000):
+        self.connection = connection
+        self.cursor = connection.cursor()
+        self.page_size = page_size
+        self.rows = {}
+        self.deleted = {}
+        self.elapsed = 0.0
+        psycopg2.extras.register_uuid()
+
+    def _insert(self, table, query, rows):
+        if not rows:
+            return
+        start = time.perf_counter()
+        psycopg2.extras.execute_values(self.cursor, query, rows, page_size=self.page_size)
+        self.elapsed += time.perf_counter() - start
+        self.rows[table] = self.rows.get(table, 0) + len(rows)
+
+    def _delete(self, table, query, parameters):
+        start = time.perf_counter()
+        self.cursor.execute(query, parameters)
+        self.elapsed += time.perf_counter() - start
+        self.deleted[table] = self.deleted.get(table, 0) + self.cursor.rowcount
+
+    def release(self, plan_id, workers, active_jobs):
+        """Delete the assignments of `workers` and every ride of `active_jobs`, whose rides are generated again"""
+        self._delete("_RideToWorker", delete_job_riders, {"activeJobs": list(active_jobs)})
+        self._delete("Ride", delete_job_rides, {"activeJobs": list(active_jobs)})
+        self._delete("_ActiveJobToWorker", delete_assignments, {"planId": plan_id, "workers": list(workers)})
+
+    def write_assignments(self, assignments, active_jobs):
+        """Insert {job: [workers]} assignments into "_ActiveJobToWorker\""""
+        rows = [(active_jobs[job]["activeJobId"], worker) for job, workers in assignments.items() for worker in workers]
+        self._insert("_ActiveJobToWorker", insert_plan, rows)
+
+    def write_rides(self, rides, joined=()):
+        """Insert rides given as (driver, car, job, passengers) tuples together with their passengers.
+
+        `joined` are passengers of stored rides as (ride, passenger) pairs.
+        """
+        ride_rows, rider_rows = [], list(joined)
+        for driver, car, job, passengers in rides:
+            ride = uuid.uuid4()
+            ride_rows.append((ride, driver, car, job))
+            rider_rows.extend((ride, passenger) for passenger in passengers)
+        self._insert("Ride", insert_ride, ride_rows)
+        self._insert("_RideToWorker", insert_rider, rider_rows)
+
+    def write_diagnostics(self, plan_id, report):
+        """Insert a diagnostics report of the plan into "Logging" where the web app lists it with the plan's events"""
+        row = (uuid.uuid4(), "planner", "Planner", plan_id, "PLAN_PLANNER_DIAGNOSTICS", json.dumps(report))
+        self._insert("Logging", insert_log, [row])
+
+    def commit(self):
+        """Commit the transaction and log the number of rows written and the write throughput"""
+        start = time.perf_counter()
+        self.connection.commit()
+        self.elapsed += time.perf_counter() - start
+        total = sum(self.rows.values())
+        rate = total / self.elapsed if self.elapsed > 0 else 0
+        tables = ", ".join(f"{table}: {count}" for table, count in self.rows.items()) or "nothing"
+        print(f"Wrote {total} rows ({tables}) in {self.elapsed:.3f}s, {rate:.0f} rows/s")
+        if self.deleted:
+            deleted = ", ".join(f"{table}: {count}" for table, count in self.deleted.items())
+            print(f"Deleted {sum(self.deleted.values())} rows ({deleted})")
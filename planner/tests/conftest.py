@@ -0,0 +1,43 @@
+import itertools
+import os
+import tempfile
+
+import pytest
+
+# Settings are read when the modules are imported, the tests never touch the cache of a real planner
+os.environ["PLANNER_CACHE_DIR"] = tempfile.mkdtemp(prefix="planner-tests-")
+os.environ.setdefault("PLANNER_SOLVER_LOG", "0")
+os.environ.setdefault("PLANNER_BACKEND", "highs")
+
+_databases = itertools.count()
+
+
+@pytest.fixture(scope="session")
+def postgres(tmp_path_factory):
+    pgserver = pytest.importorskip("pgserver")
+    server = pgserver.get_server(tmp_path_factory.mktemp("pgdata"), cleanup_mode="stop")
+    yield server
+    server.cleanup()
+
+
+@pytest.fixture
+def database(postgres, monkeypatch):
+    """Connection to a new database seeded with a random event, the planner's pool connects to it as well"""
+    import psycopg2
+
+    from src import database as planner_database
+    from tests.database import seed_event
+
+    name = f"planner_test_{next(_databases)}"
+    postgres.psql(f"CREATE DATABASE {name};")
+    url = postgres.get_uri(name)
+    conn = psycopg2.connect(url)
+    with conn.cursor() as cursor:
+        seed_event(cursor)
+    conn.commit()
+    monkeypatch.setattr(planner_database, "DATABASE_URL", url)
+    monkeypatch.setattr(planner_database, "_pool", None)
+    yield conn
+    conn.close()
+    if planner_database._pool is not None:
+        planner_database._pool.closeall()
@@ -0,0 +1,56 @@
+import datetime
+import random
+
+# The tables of the web app's schema the planner reads and writes, with only the columns it uses
+SCHEMA = """
+CREATE TABLE "Plan" (id text PRIMARY KEY, day date, "summerJobEventId" text);
+CREATE TABLE "Worker" (id text PRIMARY KEY, "isStrong" bool, "workAllergies" text[] DEFAULT '{}');
+CREATE TABLE "WorkerAvailability" (id text PRIMARY KEY, "workerId" text, "eventId" text, "workDays" date[]);
+CREATE TABLE "Car" (id text PRIMARY KEY, "ownerId" text, "forEventId" text, seats int);
+CREATE TABLE "AdorationSlot" (id text PRIMARY KEY, "eventId" text, "dateStart" timestamp);
+CREATE TABLE "_SlotWorkers" ("A" text, "B" text);
+CREATE TABLE "Area" (id text PRIMARY KEY, "requiresCar" bool, "supportsAdoration" bool);
+CREATE TABLE "ProposedJob" (id text PRIMARY KEY, "maxWorkers" int, "minWorkers" int, "strongWorkers" int,
+    "jobType" text, allergens text[] DEFAULT '{}', "areaId" text);
+CREATE TABLE "ActiveJob" (id text PRIMARY KEY, "proposedJobId" text, "planId" text);
+CREATE TABLE "_ActiveJobToWorker" ("A" text, "B" text, UNIQUE ("A", "B"));
+CREATE TABLE "Ride" (id text PRIMARY KEY, "driverId" text, "carId" text, "jobId" text);
+CREATE TABLE "_RideToWorker" ("A" text, "B" text);
+CREATE TABLE "Logging" (id text PRIMARY KEY, "authorId" text, "authorName" text, "resourceId" text, "eventType" text,
+    message text);
+"""
+
+START = datetime.date(2025, 7, 1)
+
+
+def seed_event(cursor, workers=60, jobs=10, areas=2, days=2, seed=0):
+    """Random event "event" with plans plan0, plan1, ... on consecutive days, every worker available on all of them"""
+    rnd = random.Random(seed)
+    cursor.execute(SCHEMA)
+    dates = [START + datetime.timedelta(days=d) for d in range(days)]
+    for d, day in enumerate(dates):
+        cursor.execute('INSERT INTO "Plan" VALUES (%s, %s, %s)', (f"plan{d}", day, "event"))
+    for a in range(areas):
+        cursor.execute('INSERT INTO "Area" VALUES (%s, %s, %s)', (f"area{a}", a % 2 == 0, True))
+    for j in range(jobs):
+        min_workers = rnd.randint(3, 5)
+        cursor.execute('INSERT INTO "ProposedJob" VALUES (%s, %s, %s, %s, %s, %s, %s)', (
+            f"job{j:02d}", min_workers + rnd.randint(2, 4), min_workers, rnd.randint(0, 1),
+            rnd.choice(["GARDEN", "HOUSEWORK", "WOOD"]), "{}", f"area{j % areas}"))
+        for d in range(days):
+            cursor.execute('INSERT INTO "ActiveJob" VALUES (%s, %s, %s)',
+                           (f"active{d}-{j:02d}", f"job{j:02d}", f"plan{d}"))
+    for w in range(workers):
+        cursor.execute('INSERT INTO "Worker" VALUES (%s, %s)', (f"worker{w:03d}", rnd.random() < 0.3))
+        cursor.execute('INSERT INTO "WorkerAvailability" VALUES (%s, %s, %s, %s)',
+                       (f"availability{w}", f"worker{w:03d}", "event", dates))
+        if rnd.random() < 0.25:
+            cursor.execute('INSERT INTO "Car" VALUES (%s, %s, %s, %s)',
+                           (f"car{w}", f"worker{w:03d}", "event", rnd.choice([4, 5, 7])))
+
+
+def plan_assignments(cursor, plan_id):
+    """{worker: proposed job} of the stored plan"""
+    cursor.execute('SELECT AJ."proposedJobId", AJTW."B" FROM "_ActiveJobToWorker" AJTW JOIN "ActiveJob" AJ'
+                   ' ON AJ.id = AJTW."A" WHERE AJ."planId" = %s', (plan_id,))
+    return {worker: job for job, worker in cursor.fetchall()}
@@ -0,0 +1,24 @@
+from src.snapshot import PlanSnapshot
+
+
+def job(id, area="area0", max_workers=4, min_workers=1, strong_workers=0, needed_cars=0, requires_car=False,
+        job_type="GARDEN", allergens="{}", supports_adoration=True):
+    return {"id": id, "maxWorkers": max_workers, "minWorkers": min_workers, "strongWorkers": strong_workers,
+            "jobType": job_type, "allergens": allergens, "requiresCar": requires_car,
+            "supportsAdoration": supports_adoration, "areaId": area, "neededCars": needed_cars}
+
+
+def worker(id, strong=False, seats=None, allergies="{}", adoring=False):
+    return {"id": id, "isStrong": strong, "workAllergies": allergies, "isDriver": seats is not None,
+            "isAdoring": adoring, "seats": seats}
+
+
+def snapshot(jobs, workers, areas=None, scores=None, forbids=(), forbidden_jobs=None, released=None):
+    """Snapshot of a small hand written plan, `jobs` and `workers` are lists of `job` and `worker` rows"""
+    return PlanSnapshot(
+        "plan", [row["id"] for row in jobs], {row["id"]: row for row in jobs}, {row["id"]: row for row in workers},
+        list(forbids), forbidden_jobs or {}, {row["id"]: {"id": row["id"], "activeJobId": f"active-{row['id']}"}
+                                              for row in jobs},
+        {area: {"id": area, "requiredDrivers": required} for area, required in (areas or {}).items()},
+        scores or {}, released=released,
+    )
@@ -0,0 +1,24 @@
+import threading
+
+from src.database import advisory_lock, connection
+
+
+def test_waiting_lock_runs_once_the_holder_releases_it(database):
+    released = threading.Event()
+    order = []
+
+    def wait_for_lock():
+        with connection() as conn, advisory_lock(conn, "planner:test", wait=True) as locked:
+            order.append(("waiter", locked, released.is_set()))
+
+    with connection() as conn, advisory_lock(conn, "planner:test") as locked:
+        assert locked
+        with connection() as other, advisory_lock(other, "planner:test") as other_locked:
+            assert not other_locked
+        waiter = threading.Thread(target=wait_for_lock)
+        waiter.start()
+        waiter.join(timeout=0.5)
+        assert waiter.is_alive()
+        released.set()
+    waiter.join(timeout=5)
+    assert order == [("waiter", True, True)]
@@ -0,0 +1,17 @@
+from benchmarks.synthetic import generate_event
+from src.decomposition import generate_plan_decomposed, partition
+
+
+def test_partition_gives_every_worker_one_area():
+    snapshot = generate_event(workers=60, jobs=10, areas=2).strong_workers()
+    parts = partition(snapshot)
+    workers = [worker for _, area_workers in parts.values() for worker in area_workers]
+    assert sorted(workers) == sorted(snapshot.workers)
+
+
+def test_decomposed_plan_assigns_every_worker_once():
+    snapshot = generate_event(workers=60, jobs=10, areas=2).strong_workers()
+    assignments, relaxations = generate_plan_decomposed(snapshot)
+    assert relaxations is not None
+    workers = [worker for job_workers in assignments.values() for worker in job_workers]
+    assert sorted(workers) == sorted(snapshot.workers)
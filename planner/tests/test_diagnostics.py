@@ -0,0 +1,22 @@
+from src.diagnostics import diagnose
+from tests.plans import job, snapshot, worker
+
+
+def test_jobs_short_of_strong_workers_and_seats_are_reported():
+    plan = snapshot(
+        [job("car", requires_car=True, needed_cars=4, strong_workers=2), job("walk")],
+        [worker("strong", strong=True), worker("driver", seats=3), worker("passenger")],
+    )
+    report = diagnose(plan, first_round=True, elastic=False)
+    problems = {problem["job"]: problem["issues"] for problem in report["jobProblems"]}
+    assert problems == {"car": ["too_few_strong_workers", "too_few_seats"]}
+
+
+def test_binding_rules_only_ask_cars_of_jobs_that_need_them():
+    plan = snapshot(
+        [job("car", requires_car=True, needed_cars=4, strong_workers=2), job("walk", needed_cars=2)],
+        [worker("strong", strong=True), worker("driver", seats=3), worker("passenger")],
+    )
+    binding = diagnose(plan, first_round=True, elastic=False)["binding"]
+    assert sorted((relaxation["rule"], relaxation["target"], relaxation["amount"]) for relaxation in binding) == [
+        ("neededCars", "car", 1), ("strongWorkers", "car", 1)]
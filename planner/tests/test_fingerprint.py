@@ -0,0 +1,29 @@
+from src.fingerprint import FingerprintStore, fingerprint
+from tests.plans import job, snapshot, worker
+
+
+def plan(scores=None):
+    return snapshot([job("a"), job("b")], [worker("w1"), worker("w2", seats=4)],
+                    scores=scores or {("a", "w1"): 1, ("b", "w2"): 2}, forbids=[("w2", "w1")])
+
+
+def test_row_order_does_not_matter():
+    reordered = plan()
+    reordered.jobs.reverse()
+    reordered.scores = dict(reversed(list(reordered.scores.items())))
+    assert fingerprint(reordered) == fingerprint(plan())
+
+
+def test_every_input_counts():
+    changed = plan()
+    changed.job_properties["a"]["maxWorkers"] += 1
+    assert fingerprint(changed) != fingerprint(plan())
+    assert fingerprint(plan(scores={("a", "w1"): 1})) != fingerprint(plan())
+
+
+def test_store_keeps_one_fingerprint_per_plan(tmp_path):
+    store = FingerprintStore(tmp_path)
+    assert store.get("plan") is None
+    store.put("plan", "abc")
+    store.put("plan", "def")
+    assert store.get("plan") == "def"
@@ -0,0 +1,34 @@
+import numpy as np
+
+from src.forbids import clique_cover, forbid_cliques, forbid_pairs
+
+
+def covered(cliques):
+    return {(u, v) for clique in cliques for i, u in enumerate(clique) for v in clique[i + 1:]}
+
+
+def test_pairs_are_unique_and_inside_the_plan():
+    index = {"a": 0, "b": 1, "c": 2}
+    pairs = forbid_pairs([("b", "a"), ("a", "b"), ("a", "x"), ("c", "c"), ("c", "a")], index)
+    assert pairs.tolist() == [[0, 1], [0, 2]]
+
+
+def test_triangle_is_one_clique():
+    assert clique_cover([(0, 1), (0, 2), (1, 2)]) == [[0, 1, 2]]
+
+
+def test_cover_holds_every_pair_and_no_other():
+    pairs = [(0, 1), (0, 2), (1, 2), (2, 3), (3, 4), (1, 4)]
+    cliques = clique_cover(pairs)
+    assert covered(cliques) == set(pairs)
+    assert len(cliques) == 4
+
+
+def test_cliques_only_for_jobs_both_workers_can_take():
+    pairs = np.array([[0, 1], [1, 2]])
+    viable = np.array([
+        [True, True, False],
+        [False, True, True],
+        [True, False, True],
+    ])
+    assert list(forbid_cliques(pairs, viable)) == [(0, [[0, 1]]), (1, [[1, 2]])]
@@ -0,0 +1,97 @@
+import datetime
+
+import psycopg2.extras
+
+from src.history import HistoryStore, checksum
+from src.queries import select_event_plans
+from src.snapshot import PlanSnapshot
+from src.solver import generate_plans_from_message
+from tests.database import START
+
+
+def assign(conn, rows):
+    with conn.cursor() as cursor:
+        cursor.executemany('INSERT INTO "_ActiveJobToWorker" ("A", "B") VALUES (%s, %s)', rows)
+    conn.commit()
+
+
+def load(conn, store, plan_id="plan1"):
+    with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+        history = store.load(cursor, plan_id)
+    conn.rollback()
+    return history
+
+
+def workers_of(history, plan_id="plan0"):
+    return {active_job: sorted(job["workers"]) for active_job, job in history.plans[plan_id]["jobs"].items()}
+
+
+def test_checksum_matches_the_database(database):
+    assign(database, [("active0-01", "worker001"), ("active0-00", "worker002"), ("active0-00", "worker010")])
+    with database.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+        cursor.execute(select_event_plans, {"eventId": "event"})
+        stored = {row["id"]: row["checksum"] for row in cursor.fetchall()}
+    jobs = {"active0-00": {"workers": ["worker010", "worker002"]}, "active0-01": {"workers": ["worker001"]}}
+    assert stored == {"plan0": checksum(jobs), "plan1": None}
+
+
+def test_swapped_workers_are_synchronized(database, tmp_path):
+    store = HistoryStore(tmp_path)
+    assign(database, [("active0-00", "worker001"), ("active0-01", "worker002")])
+    assert workers_of(load(database, store)) == {"active0-00": ["worker001"], "active0-01": ["worker002"]}
+
+    # The same number of assignments, but the two workers swapped jobs
+    with database.cursor() as cursor:
+        cursor.execute('UPDATE "_ActiveJobToWorker" SET "A" = CASE "A" WHEN %s THEN %s ELSE %s END',
+                       ("active0-00", "active0-01", "active0-00"))
+    database.commit()
+    assert workers_of(load(database, store)) == {"active0-00": ["worker002"], "active0-01": ["worker001"]}
+
+
+def test_recorded_plan_needs_no_synchronization(database, tmp_path):
+    store = HistoryStore(tmp_path)
+    history = load(database, store, "plan0")
+    active_jobs = {"job00": {"activeJobId": "active0-00"}}
+    assign(database, [("active0-00", "worker003")])
+    history.record({"job00": ["worker003"]}, active_jobs, {"job00": {"jobType": "GARDEN"}})
+
+    with database.cursor() as cursor:
+        # A re-read of the plan would see the changed job type, a cache in sync keeps the recorded one
+        cursor.execute('UPDATE "ProposedJob" SET "jobType" = %s WHERE id = %s', ("WOOD", "job00"))
+    database.commit()
+    assert load(database, store).plans["plan0"]["jobs"]["active0-00"]["jobType"] == "GARDEN"
+
+
+def test_batch_keeps_the_history_of_each_event_apart(database):
+    day = START + datetime.timedelta(days=2)
+    with database.cursor() as cursor:
+        cursor.execute('INSERT INTO "Plan" VALUES (%s, %s, %s)', ("other0", day, "other"))
+        cursor.execute('INSERT INTO "ActiveJob" SELECT %s || id, id, %s FROM "ProposedJob"', ("other0-", "other0"))
+        cursor.execute('INSERT INTO "WorkerAvailability" SELECT %s || id, id, %s, %s FROM "Worker"',
+                       ("other", "other", [day]))
+    database.commit()
+
+    run = generate_plans_from_message(["plan0", "plan1", "other0"])
+    assert run["skipped"] == [] and run["solved"]
+    store = HistoryStore()
+    assert set(store._read("event")) == {"plan0", "plan1"}
+    assert set(store._read("other")) == {"other0"}
+
+
+def test_database_history_matches_the_cache(database):
+    # Assignments of an earlier day, a later day and a day of another event, only the earlier day counts
+    day = START + datetime.timedelta(days=-1)
+    with database.cursor() as cursor:
+        cursor.execute('INSERT INTO "Plan" VALUES (%s, %s, %s)', ("other0", day, "other"))
+        cursor.execute('INSERT INTO "ActiveJob" VALUES (%s, %s, %s)', ("other0-00", "job00", "other0"))
+    assign(database, [(f"active{d}-{j:02d}", f"worker{w:03d}")
+                      for d, j, w in [(0, 0, 1), (0, 0, 2), (0, 0, 3), (0, 1, 4), (0, 1, 5)]]
+           + [("other0-00", "worker004"), ("other0-00", "worker005"), ("active1-02", "worker001")])
+    for plan_id in ("plan0", "plan1"):
+        cached = PlanSnapshot.load(database, plan_id, HistoryStore())
+        stored = PlanSnapshot.load(database, plan_id)
+        assert sorted(stored.forbids) == sorted(cached.forbids)
+        assert stored.forbidden_jobs == cached.forbidden_jobs
+        assert stored.scores == cached.scores
+    assert sorted(cached.forbids) == [("worker002", "worker001"), ("worker003", "worker001"),
+                                      ("worker003", "worker002"), ("worker005", "worker004")]
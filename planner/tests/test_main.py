@@ -0,0 +1,66 @@
+import json
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import main
+from src.worker import TransientError
+
+
+class Executor:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, function, *args):
+        self.submitted.append((function.__name__, args))
+        return Future()
+
+
+class Channel:
+    def __init__(self):
+        self.nacked = []
+
+    def basic_nack(self, delivery_tag, requeue=True):
+        self.nacked.append((delivery_tag, requeue))
+
+
+def deliver(messages):
+    executor, channel, in_flight = Executor(), Channel(), {}
+    for tag, message in enumerate(messages):
+        main.on_message(channel, SimpleNamespace(delivery_tag=tag), None, json.dumps(message), executor, in_flight)
+    return executor.submitted, in_flight
+
+
+def test_identical_messages_coalesce():
+    submitted, in_flight = deliver([{"planId": "p"}, {"planId": "p"}])
+    assert len(submitted) == 1
+    assert list(in_flight.values()) == [[0, 1]]
+
+
+def test_messages_asking_for_more_are_planned_themselves():
+    submitted, _ = deliver([
+        {"planId": "p"},
+        {"planId": "p", "diagnostics": True},
+        {"planId": "p", "solver": {"backend": "highs"}},
+        {"planId": "p", "replan": {"workers": ["w"]}},
+    ])
+    assert [args for _, args in submitted] == [
+        ("p", None, False, None),
+        ("p", None, True, None),
+        ("p", {"backend": "highs"}, False, None),
+        ("p", None, False, {"workers": ["w"]}),
+    ]
+
+
+def failed(error):
+    channel, future = Channel(), Future()
+    future.set_exception(error)
+    main.on_done(channel, {"p": [0, 1]}, "p", "p", 0.0, future)
+    return channel.nacked
+
+
+def test_database_outages_are_requeued():
+    assert failed(TransientError("OperationalError('server closed the connection')")) == [(0, True), (1, True)]
+
+
+def test_failing_plans_are_dropped():
+    assert failed(KeyError("job")) == [(0, False), (1, False)]
@@ -0,0 +1,22 @@
+from benchmarks.synthetic import generate_event
+from src import metrics
+from src.decomposition import generate_plan_decomposed
+from src.solver import generate_plans_from_message
+
+
+def test_decomposed_round_records_every_solve():
+    run = metrics.start_run("plan")
+    generate_plan_decomposed(generate_event(workers=60, jobs=10, areas=2).strong_workers())
+    models = [solve["model"] for solve in run.solves]
+    assert models[0] == "coordination"
+    assert models.count("plan") >= 2
+    assert run.phases["solve"] > 0 and run.phases["build"] > 0
+
+
+def test_parallel_batch_records_the_solves_of_its_days(database):
+    run = generate_plans_from_message(plan_ids=["plan0", "plan1"], parallel=True)
+    assert run["skipped"] == []
+    rounds = [solve["round"] for solve in run["solves"]]
+    # Round one of a day may be solved again with the area driver minimums
+    assert rounds.count(1) >= 2 and rounds.count(2) == 2
+    assert run["phases"]["solve"] > 0
@@ -0,0 +1,49 @@
+from src.model import ACCEPTED_STATUSES, SolverProfile, SparseModel
+
+
+def solve(model, backend):
+    status, solution = model.solve(SolverProfile(backend=backend, msg=False))
+    assert status in ACCEPTED_STATUSES
+    return solution
+
+
+def capacity_model():
+    # Three workers for a job of two, the third one has to go to the other job
+    model = SparseModel()
+    for worker, cost in (("w1", 0), ("w2", 0), ("w3", 1)):
+        model.add_variable("a", worker, cost)
+        model.add_variable("b", worker, 5)
+        model.add_row([model.columns[("a", worker)], model.columns[("b", worker)]], lower=1, upper=1)
+    model.add_row([model.columns[("a", worker)] for worker in ("w1", "w2", "w3")], upper=2)
+    return model
+
+
+def test_rows_bound_the_assignment():
+    for backend in SolverProfile.BACKENDS:
+        model = capacity_model()
+        assignments = model.assignments(solve(model, backend))
+        assert sorted(assignments["a"]) == ["w1", "w2"] and assignments["b"] == ["w3"]
+        assert model.info["objective"] == 5
+
+
+def test_relaxations_report_the_used_slacks():
+    for backend in SolverProfile.BACKENDS:
+        model = capacity_model()
+        x = model.columns[("a", "w1")]
+        model.add_row([x, model.add_slack("minWorkers", "a", 10)], lower=3)
+        model.add_row([x, model.add_slack("unused", "b", 10)], lower=0)
+        relaxations = model.relaxations(solve(model, backend))
+        assert relaxations == [{"rule": "minWorkers", "target": "a", "amount": 2.0}]
+
+
+def test_weighted_rows_count_seats():
+    model = SparseModel()
+    for worker, seats in (("small", 2), ("big", 5)):
+        model.add_variable("car", worker, 1)
+    model.add_row([model.columns[("car", "small")], model.columns[("car", "big")]], [2, 5], lower=4)
+    assert model.assignments(solve(model, "highs")) == {"car": ["big"]}
+
+
+def test_start_seeds_each_worker_once():
+    model = capacity_model()
+    assert model.set_start({"a": ["w1", "x"]}, {"b": ["w1", "w2"]}) == 2
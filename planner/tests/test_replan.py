@@ -0,0 +1,63 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.database import advisory_lock, connection
+from src.solver import generate_plan_from_message
+from tests.database import plan_assignments
+
+
+def fill_every_job(database):
+    """Plan plan0 and leave no free place in any of its jobs, returns the stored assignments"""
+    generate_plan_from_message("plan0")
+    with database.cursor() as cursor:
+        cursor.execute('''UPDATE "ProposedJob" PJ SET "maxWorkers" = (
+            SELECT count(*) FROM "ActiveJob" AJ JOIN "_ActiveJobToWorker" AJTW ON AJTW."A" = AJ.id
+            WHERE AJ."planId" = 'plan0' AND AJ."proposedJobId" = PJ.id)''')
+        assignments = plan_assignments(cursor, "plan0")
+    database.commit()
+    return assignments
+
+
+def test_infeasible_replan_keeps_the_stored_plan(database):
+    assignments = fill_every_job(database)
+    with database.cursor() as cursor:
+        # The job loses a place its workers cannot find anywhere else
+        cursor.execute('UPDATE "ProposedJob" SET "maxWorkers" = "maxWorkers" - 1 WHERE id = %s', ("job00",))
+        cursor.execute('SELECT count(*) FROM "Ride"')
+        rides = cursor.fetchone()
+    database.commit()
+
+    run = generate_plan_from_message("plan0", replan={"jobs": ["job00"], "workers": []})
+    assert not run["solved"]
+    with database.cursor() as cursor:
+        assert plan_assignments(cursor, "plan0") == assignments
+        cursor.execute('SELECT count(*) FROM "Ride"')
+        assert cursor.fetchone() == rides
+        cursor.execute('SELECT count(*) FROM "Logging" WHERE "eventType" = %s', ("PLAN_PLANNER_DIAGNOSTICS",))
+        assert cursor.fetchone()[0] >= 1
+
+
+def test_replan_moves_only_released_workers(database):
+    generate_plan_from_message("plan0")
+    with database.cursor() as cursor:
+        before = plan_assignments(cursor, "plan0")
+    released = {worker for worker, job in before.items() if job == "job03"}
+
+    run = generate_plan_from_message("plan0", replan={"jobs": ["job03"], "workers": []})
+    assert run["solved"]
+    with database.cursor() as cursor:
+        after = plan_assignments(cursor, "plan0")
+    assert set(after) == set(before)
+    assert {worker for worker in before if after[worker] != before[worker]} <= released
+
+
+def test_replan_waits_for_a_running_planner(database):
+    generate_plan_from_message("plan0")
+    executor = ThreadPoolExecutor(1)
+    with connection() as conn, advisory_lock(conn, "planner:plan0"):
+        future = executor.submit(generate_plan_from_message, "plan0", replan={"jobs": ["job03"], "workers": []})
+        time.sleep(0.5)
+        assert not future.done()
+    run = future.result(timeout=30)
+    executor.shutdown()
+    assert run["skipped"] == [] and run["solved"]
@@ -0,0 +1,49 @@
+from src.rides import generate_rides, plan_rides
+from src.writer import PlanWriter
+
+
+def row(job, worker, seats=None):
+    return {"job": job, "worker": worker, "carId": f"car-{worker}" if seats else None, "seats": seats}
+
+
+def test_largest_cars_are_filled_first():
+    rows = [row("a", "small", 3), row("a", "big", 5)] + [row("a", f"p{i}") for i in range(5)]
+    rides, joined, unseated = plan_rides(rows)
+    assert rides == [("big", "car-big", "a", ["p0", "p1", "p2", "p3"]), ("small", "car-small", "a", ["p4"])]
+    assert joined == [] and unseated == []
+
+
+def test_passengers_of_a_job_without_drivers_are_unseated():
+    rides, _, unseated = plan_rides([row("a", "driver", 4), row("a", "p0"), row("b", "p1"), row("b", "p2")])
+    assert rides == [("driver", "car-driver", "a", ["p0"])]
+    assert unseated == ["p1", "p2"]
+
+
+def test_open_rides_take_passengers_before_new_rides():
+    rows = [row("a", "driver", 5), row("a", "p0"), row("a", "p1"), row("a", "p2")]
+    open_rides = [{"id": "ride1", "job": "a", "free": 1}, {"id": "ride2", "job": "a", "free": 2}]
+    rides, joined, unseated = plan_rides(rows, open_rides)
+    assert joined == [("ride2", "p0"), ("ride2", "p1"), ("ride1", "p2")]
+    assert rides == [] and unseated == []
+
+
+def test_new_passenger_joins_a_stored_ride(database):
+    with database.cursor() as cursor:
+        cursor.execute('SELECT "ownerId", id FROM "Car" WHERE seats = 4 LIMIT 1')
+        driver, car = cursor.fetchone()
+        cursor.execute('SELECT id FROM "Worker" WHERE id NOT IN (SELECT "ownerId" FROM "Car") LIMIT 2')
+        riding, joining = (worker for worker, in cursor.fetchall())
+        cursor.executemany('INSERT INTO "_ActiveJobToWorker" VALUES (%s, %s)',
+                           [("active0-00", driver), ("active0-00", riding), ("active0-00", joining)])
+        cursor.execute('INSERT INTO "Ride" VALUES (%s, %s, %s, %s)', ("ride", driver, car, "active0-00"))
+        cursor.execute('INSERT INTO "_RideToWorker" VALUES (%s, %s)', ("ride", riding))
+    database.commit()
+
+    writer = PlanWriter(database)
+    generate_rides("plan0", database, writer)
+    writer.commit()
+    with database.cursor() as cursor:
+        cursor.execute('SELECT count(*) FROM "Ride"')
+        assert cursor.fetchone() == (1,)
+        cursor.execute('SELECT "B" FROM "_RideToWorker" WHERE "A" = %s ORDER BY "B"', ("ride",))
+        assert [worker for worker, in cursor.fetchall()] == sorted([riding, joining])
@@ -0,0 +1,62 @@
+from src.fingerprint import FingerprintStore, fingerprint
+from src.history import HistoryStore
+from src.snapshot import PlanSnapshot
+from src.solver import generate_plan_from_message
+from src.writer import PlanWriter
+from tests.plans import job, snapshot, worker
+
+
+def test_after_takes_the_assigned_workers_out():
+    plan = snapshot(
+        [job("a", area="cars", requires_car=True, max_workers=5, min_workers=3, strong_workers=1, needed_cars=6),
+         job("b")],
+        [worker("strong", strong=True), worker("driver", seats=4), worker("free")],
+        areas={"cars": 10},
+    )
+    after = plan.after({"a": ["strong", "driver"]})
+    assert list(after.workers) == ["free"]
+    properties = after.job_properties["a"]
+    assert (properties["maxWorkers"], properties["minWorkers"], properties["strongWorkers"]) == (3, 1, 0)
+    assert properties["neededCars"] == 2
+    assert after.areas["cars"]["requiredDrivers"] == 6
+    # The original snapshot is left as it is
+    assert plan.job_properties["a"]["neededCars"] == 6 and plan.areas["cars"]["requiredDrivers"] == 10
+
+
+def test_after_matches_a_fresh_load(database):
+    history = HistoryStore()
+    loaded = PlanSnapshot.load(database, "plan0", history)
+    drivers = [id for id, row in loaded.workers.items() if row["isDriver"]][:3]
+    others = [id for id, row in loaded.workers.items() if not row["isDriver"]][:2]
+    assignments = {"job00": drivers[:2] + others[:1], "job01": drivers[2:] + others[1:]}
+
+    writer = PlanWriter(database)
+    writer.write_assignments(assignments, loaded.active_jobs)
+    writer.commit()
+    assert fingerprint(loaded.after(assignments)) == fingerprint(PlanSnapshot.load(database, "plan0", history))
+
+
+def test_stored_plan_is_unchanged_for_the_next_message(database):
+    generate_plan_from_message("plan0")
+    assert FingerprintStore().get("plan0") == fingerprint(PlanSnapshot.load(database, "plan0", HistoryStore()))
+    assert generate_plan_from_message("plan0")["skipped"] == ["plan0"]
+
+
+def make_infeasible(database):
+    with database.cursor() as cursor:
+        # No job can take any worker, every worker of round one is left without a job
+        cursor.execute('UPDATE "ProposedJob" SET "maxWorkers" = 0')
+    database.commit()
+
+
+def test_failed_plan_is_planned_again(database):
+    make_infeasible(database)
+    assert not generate_plan_from_message("plan0")["solved"]
+    run = generate_plan_from_message("plan0")
+    assert run["skipped"] == [] and not run["solved"]
+
+
+def test_solver_settings_plan_an_unchanged_plan_again(database):
+    generate_plan_from_message("plan0")
+    run = generate_plan_from_message("plan0", {"timeLimit": 600})
+    assert run["skipped"] == [] and run["solved"]
@@ -0,0 +1,42 @@
+from src.model import SolverProfile, SparseModel
+from src.planning import generate_plan
+from src.solver import plan_rounds
+from tests.plans import job, snapshot, worker
+
+
+def car_plan(needed_cars):
+    # Both drivers prefer the job without a car, the car area asks for far more seats than it needs
+    return snapshot(
+        [job("car", area="cars", requires_car=True, needed_cars=needed_cars), job("walk", area="walk")],
+        [worker("d1", seats=5), worker("d2", seats=5)],
+        areas={"cars": 8},
+        scores={("car", "d1"): 5, ("car", "d2"): 5},
+    )
+
+
+def test_area_drivers_only_apply_when_job_cars_are_relaxed():
+    assignments, relaxations = generate_plan(car_plan(0), elastic=True)
+    assert assignments == {"walk": ["d1", "d2"]}
+    assert relaxations == []
+
+
+def test_area_drivers_replace_job_cars_that_cannot_be_found():
+    assignments, relaxations = generate_plan(car_plan(20), elastic=True)
+    assert sorted(assignments["car"]) == ["d1", "d2"]
+    assert [(relaxation["rule"], relaxation["target"]) for relaxation in relaxations] == [("neededCars", "car")]
+
+
+def test_strict_plan_fails_without_the_cars():
+    assert generate_plan(car_plan(20), elastic=False) == ({}, None)
+
+
+def test_rounds_are_seeded_from_the_previous_day(monkeypatch):
+    plan = snapshot([job("a"), job("b")], [worker("strong", strong=True), worker("weak")])
+    plan.previous_assignments = {"b": ["strong", "weak"]}
+    seeded = []
+    set_start = SparseModel.set_start
+    monkeypatch.setattr(SparseModel, "set_start", lambda model, *sources: seeded.append(set_start(model, *sources)))
+
+    plan_rounds(plan, SolverProfile(backend="highs", msg=False))
+    # Each round has one of the workers and seeds it from the previous day
+    assert seeded == [1, 1]
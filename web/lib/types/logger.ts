@@ -10,6 +10,7 @@ export enum APILogEvent {
   PLAN_MODIFY = 'PLAN_MODIFY',
   PLAN_DELETE = 'PLAN_DELETE',
   PLAN_PLANNER_START = 'PLAN_PLANNER_START',
+  PLAN_PLANNER_DIAGNOSTICS = 'PLAN_PLANNER_DIAGNOSTICS',
   PLAN_JOB_ADD = 'PLAN_JOB_ADD',
   PLAN_JOBS_ADD = 'PLAN_JOBS_ADD',
   PLAN_JOB_DELETE = 'PLAN_JOB_REMOVE',